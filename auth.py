@@ -1,144 +1,245 @@
-from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import HTTPException, status, Depends
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from models import User, TokenSession, UserType
-from database import get_db
-import secrets
-
-from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, MAX_DEVICES_PER_USER
-
-# Prefer pbkdf2_sha256 only to avoid importing native bcrypt backend at startup (prevents
-# bcrypt-related initialization errors and the 72-byte limitation). This is secure and
-# avoids native dependency issues in the deployment environment.
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
-security = HTTPBearer()
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica se a senha está correta"""
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password: str) -> str:
-    """Gera hash da senha"""
-    return pwd_context.hash(password)
-
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    """Cria token de acesso"""
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-def verify_token(token: str, credentials_exception):
-    """Verifica e decodifica o token"""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("sub")
-        email: str = payload.get("email")
-        
-        if user_id is None or email is None:
-            raise credentials_exception
-            
-        return {"user_id": user_id, "email": email}
-    except JWTError:
-        raise credentials_exception
-
-def check_device_limit(user_id: int, db: Session, device_info: str = None):
-    """Verifica se o usuário pode criar mais sessões (máximo 2 dispositivos)"""
-    # Remove sessões expiradas
-    expired_sessions = db.query(TokenSession).filter(
-        TokenSession.user_id == user_id,
-        TokenSession.expires_at < datetime.utcnow()
-    ).all()
-    
-    for session in expired_sessions:
-        session.is_active = False
-    
-    db.commit()
-    
-    # Conta sessões ativas
-    active_sessions = db.query(TokenSession).filter(
-        TokenSession.user_id == user_id,
-        TokenSession.is_active == True,
-        TokenSession.expires_at > datetime.utcnow()
-    ).count()
-    
-    if active_sessions >= MAX_DEVICES_PER_USER:
-        # Remove a sessão mais antiga
-        oldest_session = db.query(TokenSession).filter(
-            TokenSession.user_id == user_id,
-            TokenSession.is_active == True
-        ).order_by(TokenSession.created_at.asc()).first()
-        
-        if oldest_session:
-            oldest_session.is_active = False
-            db.commit()
-
-def create_token_session(user_id: int, token: str, db: Session, device_info: str = None):
-    """Cria uma nova sessão de token"""
-    check_device_limit(user_id, db, device_info)
-    
-    expires_at = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    token_session = TokenSession(
-        user_id=user_id,
-        token=token,
-        device_info=device_info,
-        expires_at=expires_at
-    )
-    
-    db.add(token_session)
-    db.commit()
-    return token_session
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Obtém o usuário atual baseado no token"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    token_data = verify_token(credentials.credentials, credentials_exception)
-    
-    # Verifica se a sessão do token está ativa
-    token_session = db.query(TokenSession).filter(
-        TokenSession.token == credentials.credentials,
-        TokenSession.is_active == True,
-        TokenSession.expires_at > datetime.utcnow()
-    ).first()
-    
-    if not token_session:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.id == token_data["user_id"]).first()
-    if user is None:
-        raise credentials_exception
-    
-    return user
-
-def get_current_admin_user(current_user: User = Depends(get_current_user)):
-    """Verifica se o usuário atual é admin"""
-    if current_user.tipo_usuario != UserType.ADMIN:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
-    return current_user
-
-def authenticate_user(email: str, password: str, db: Session):
-    """Autentica usuário com email e senha"""
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        return False
-    if not verify_password(password, user.senha):
-        return False
-    return user
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from jose import JWTError, jwt
+from passlib.context import CryptContext
+from fastapi import HTTPException, status, Depends
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models import User, TokenSession, UserType
+from database import get_db, get_async_db
+from session_cache import session_cache, token_digest, detached_copy
+from hash_pool import hash_pool
+from session_epochs import session_epochs
+import secrets
+
+from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, MAX_DEVICES_PER_USER, AUTH_STATELESS_MODE
+
+# Prefer pbkdf2_sha256 only to avoid importing native bcrypt backend at startup (prevents
+# bcrypt-related initialization errors and the 72-byte limitation). This is secure and
+# avoids native dependency issues in the deployment environment.
+pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+security = HTTPBearer()
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verifica se a senha está correta"""
+    return pwd_context.verify(plain_password, hashed_password)
+
+def get_password_hash(password: str) -> str:
+    """Gera hash da senha"""
+    return pwd_context.hash(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifica a senha no pool de hashing, sem bloquear o event loop"""
+    return await hash_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Gera o hash da senha no pool de hashing, sem bloquear o event loop"""
+    return await hash_pool.run(pwd_context.hash, password)
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    """Cria token de acesso"""
+    to_encode = data.copy()
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    
+    # jti garante tokens (e digests) distintos mesmo para logins no mesmo segundo
+    to_encode.update({"exp": expire, "jti": secrets.token_urlsafe(16)})
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return encoded_jwt
+
+def verify_token(token: str, credentials_exception):
+    """Verifica e decodifica o token"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        user_id: int = payload.get("sub")
+        email: str = payload.get("email")
+        
+        if user_id is None or email is None:
+            raise credentials_exception
+            
+        return {
+            "user_id": user_id,
+            "email": email,
+            "seq": payload.get("seq"),
+            "exp": datetime.utcfromtimestamp(payload["exp"]),
+        }
+    except JWTError:
+        raise credentials_exception
+
+def reserve_session_seq(user_id: int, db: Session):
+    """Reserva o número sequencial do próximo token do usuário (claim `seq`)
+
+    Na mesma instrução eleva o session_epoch para que só os MAX_DEVICES_PER_USER
+    tokens mais recentes continuem válidos no modo stateless. Não faz commit.
+    Retorna (seq, session_epoch).
+    """
+    new_seq = User.session_seq + 1
+    min_valid_seq = new_seq - MAX_DEVICES_PER_USER + 1
+    raises_epoch = min_valid_seq > User.session_epoch
+    
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            session_seq=new_seq,
+            session_epoch=case((raises_epoch, min_valid_seq), else_=User.session_epoch),
+            # updated_at só muda junto com o epoch (é por ele que o refresh incremental lê)
+            updated_at=case((raises_epoch, func.now()), else_=User.updated_at),
+        )
+        .returning(User.session_seq, User.session_epoch)
+        .execution_options(synchronize_session=False)
+    )
+    seq, epoch = db.execute(stmt).one()
+    return seq, epoch
+
+def revoke_user_sessions(user_id: int, db: Session) -> int:
+    """Invalida todos os tokens já emitidos para o usuário. Não faz commit."""
+    db.query(TokenSession).filter(
+        TokenSession.user_id == user_id,
+        TokenSession.is_active == True
+    ).update({TokenSession.is_active: False}, synchronize_session=False)
+    
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .values(session_epoch=User.session_seq + 1)
+        .returning(User.session_epoch)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).scalar_one()
+
+def check_device_limit(user_id: int, db: Session, device_info: str = None) -> List[str]:
+    """Libera espaço para uma nova sessão (máximo MAX_DEVICES_PER_USER dispositivos)
+
+    Numa única instrução desativa as sessões expiradas e as ativas que excedem o
+    limite, mantendo as MAX_DEVICES_PER_USER - 1 mais recentes. Não faz commit (roda
+    na transação de create_token_session) e retorna os token_hash desativados.
+    """
+    now = datetime.utcnow()
+    
+    # Numera as sessões válidas da mais nova para a mais antiga
+    ranked = select(
+        TokenSession.id,
+        func.row_number().over(
+            order_by=(TokenSession.created_at.desc(), TokenSession.id.desc())
+        ).label("position")
+    ).where(
+        TokenSession.user_id == user_id,
+        TokenSession.is_active == True,
+        TokenSession.expires_at > now
+    ).subquery()
+    excess = select(ranked.c.id).where(ranked.c.position >= MAX_DEVICES_PER_USER)
+    
+    stmt = (
+        update(TokenSession)
+        .where(
+            TokenSession.user_id == user_id,
+            TokenSession.is_active == True,
+            or_(TokenSession.expires_at <= now, TokenSession.id.in_(excess))
+        )
+        .values(is_active=False)
+        .returning(TokenSession.token_hash)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).scalars().all()
+
+def create_token_session(user_id: int, token: str, db: Session, device_info: str = None):
+    """Cria uma nova sessão de token"""
+    evicted = check_device_limit(user_id, db, device_info)
+    
+    expires_at = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    
+    token_session = TokenSession(
+        user_id=user_id,
+        token_hash=token_digest(token),
+        device_info=device_info,
+        expires_at=expires_at
+    )
+    
+    db.add(token_session)
+    db.commit()
+    
+    for digest in evicted:
+        session_cache.invalidate_token(digest)
+    return token_session
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+    adb: AsyncSession = Depends(get_async_db)
+):
+    """Obtém o usuário atual baseado no token
+
+    As consultas usam a sessão async; o usuário retornado é anexado (sem I/O) à
+    sessão síncrona da requisição, para que as rotas de escrita possam alterá-lo.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    token_data = verify_token(credentials.credentials, credentials_exception)
+    user_id = int(token_data["user_id"])
+    digest = token_digest(credentials.credentials)
+    
+    # Modo stateless: assinatura válida + seq dentro do epoch do usuário basta
+    stateless = (
+        AUTH_STATELESS_MODE
+        and token_data["seq"] is not None
+        and session_epochs.is_fresh()
+    )
+    if stateless and token_data["seq"] < session_epochs.get(user_id):
+        raise credentials_exception
+    
+    # Sessão já resolvida recentemente: reanexa o snapshot sem consultar o banco
+    cached = session_cache.get(digest)
+    if cached is not None:
+        if cached.user_id != user_id:
+            raise credentials_exception
+        return db.merge(cached.user, load=False)
+    
+    if stateless:
+        session_id, expires_at = None, token_data["exp"]
+    else:
+        # Verifica se a sessão do token está ativa
+        result = await adb.execute(select(TokenSession).where(
+            TokenSession.token_hash == digest,
+            TokenSession.is_active == True,
+            TokenSession.expires_at > datetime.now(timezone.utc)
+        ))
+        token_session = result.scalars().first()
+        
+        if not token_session:
+            raise credentials_exception
+        session_id, expires_at = token_session.id, token_session.expires_at
+    
+    result = await adb.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
+    if user is None:
+        raise credentials_exception
+    
+    session_cache.set(digest, session_id, user, expires_at)
+    return db.merge(detached_copy(user), load=False)
+
+def get_current_admin_user(current_user: User = Depends(get_current_user)):
+    """Verifica se o usuário atual é admin"""
+    if current_user.tipo_usuario != UserType.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return current_user
+
+async def authenticate_user(email: str, password: str, db: Session):
+    """Autentica usuário com email e senha"""
+    user = db.query(User).filter(User.email == email).first()
+    if not user:
+        return False
+    if not await verify_password_async(password, user.senha):
+        return False
+    return user
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark da serialização das listagens de edições (custo por linha)
+
+Compara, sobre um SQLite em memória com N edições, o caminho antigo
+(objetos ORM -> JornalResponse por linha -> validação do response_model ->
+json) com o caminho rápido de serialization.py (colunas -> dicts -> orjson):
+
+    python bench_serialization.py --rows 100 --repeat 200 > bench_output.txt
+
+Precisa das mesmas variáveis de ambiente da API (config.py exige
+DATABASE_URL), mas não se conecta ao banco configurado.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from file_handler import get_file_url, get_pdf_url
+from models import Base, Jornal
+from schemas import JornalResponse
+from serialization import JORNAL_COLUMNS, FastJSONResponse, jornal_rows_to_dicts
+
+response_adapter = TypeAdapter(List[JornalResponse])
+
+
+def old_path(session: Session, limit: int) -> bytes:
+    jornais = session.execute(select(Jornal).order_by(Jornal.data_publicacao.desc()).limit(limit)).scalars().all()
+    responses = [
+        JornalResponse(
+            id=jornal.id,
+            titulo=jornal.titulo,
+            capa=get_file_url(jornal.capa) if jornal.capa else None,
+            arquivopdf=get_pdf_url(jornal.id, jornal.arquivopdf),
+            data_publicacao=jornal.data_publicacao,
+            is_active=jornal.is_active,
+            created_at=jornal.created_at,
+            updated_at=jornal.updated_at
+        )
+        for jornal in jornais
+    ]
+    # O que o FastAPI faz com o response_model: valida de novo e serializa
+    validated = response_adapter.validate_python(responses, from_attributes=True)
+    content = response_adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(session: Session, limit: int) -> bytes:
+    rows = session.execute(select(*JORNAL_COLUMNS).order_by(Jornal.data_publicacao.desc()).limit(limit)).all()
+    return FastJSONResponse(jornal_rows_to_dicts(rows)).body
+
+
+def measure(fn, session: Session, rows: int, repeat: int) -> float:
+    """Microssegundos por linha (melhor de 3 rodadas)"""
+    best = None
+    for _ in range(3):
+        session.expunge_all()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn(session, rows)
+            session.expunge_all()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / (repeat * rows) * 1_000_000
+
+
+def main():
+    """Função principal do benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark da serialização das listagens de jornais")
+    parser.add_argument("--rows", type=int, default=100, help="linhas por página")
+    parser.add_argument("--repeat", type=int, default=200, help="páginas serializadas por rodada")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        now = datetime.utcnow()
+        session.add_all([
+            Jornal(
+                titulo=f"Edição {i} - Notícias do dia",
+                capa=f"covers/{i:08d}.jpg" if i % 2 else None,
+                arquivopdf=f"pdfs/{i:08d}.pdf",
+                data_publicacao=now - timedelta(days=i),
+                updated_at=now,
+            )
+            for i in range(args.rows)
+        ])
+        session.commit()
+
+        assert json.loads(old_path(session, args.rows)) == json.loads(fast_path(session, args.rows))
+
+        old_us = measure(old_path, session, args.rows, args.repeat)
+        fast_us = measure(fast_path, session, args.rows, args.repeat)
+
+    print(f"linhas por página: {args.rows}, páginas por rodada: {args.repeat}")
+    print(f"caminho antigo (ORM + JornalResponse + response_model): {old_us:8.2f} µs/linha")
+    print(f"caminho rápido (colunas + dicts + orjson):              {fast_us:8.2f} µs/linha")
+    print(f"ganho: {old_us / fast_us:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
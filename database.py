@@ -1,37 +1,397 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import OperationalError
-import logging
-
-from config import DATABASE_URL
-
-
-# Ensure we use SQLAlchemy-friendly scheme (config.py normalizes postgres:// -> postgresql://)
-SQLALCHEMY_DATABASE_URL =DATABASE_URL
-
-# Use pool_pre_ping so SQLAlchemy checks connections before using them (helps with dropped connections)
-engine_kwargs = {
-    "pool_pre_ping": True,
-}
-
-try:
-    engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_kwargs)
-except Exception as e:
-    logging.critical("Failed to create SQLAlchemy engine: %s", str(e))
-    # Re-raise to fail fast in deployment; config.py already enforces DATABASE_URL presence
-    raise
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-Base = declarative_base()
-
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.exc import DBAPIError, OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+import logging
+import threading
+import time
+import uuid
+
+import metrics
+from config import (
+    DATABASE_URL,
+    DATABASE_READ_URL,
+    DATABASE_READ_MAX_LAG_SECONDS,
+    DATABASE_READ_CHECK_INTERVAL_SECONDS,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_ASYNC_POOL_SIZE,
+    DB_ASYNC_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS,
+    DB_PGBOUNCER_MODE,
+)
+
+
+# Ensure we use SQLAlchemy-friendly scheme (config.py normalizes postgres:// -> postgresql://)
+SQLALCHEMY_DATABASE_URL =DATABASE_URL
+
+
+class PoolStats:
+    """Counters for time spent waiting on a pooled connection (checkout)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(1000 * self.wait_seconds_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(1000 * self.wait_seconds_max, 3),
+            }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited (including new connections)."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_stats.record(time.perf_counter() - started)
+        return connection
+
+
+def split_pool_budget(is_async: bool) -> tuple:
+    """(pool_size, max_overflow) of the async or the sync engine within DB_POOL_SIZE/DB_MAX_OVERFLOW."""
+    if is_async:
+        return DB_ASYNC_POOL_SIZE, DB_ASYNC_MAX_OVERFLOW
+    return max(1, DB_POOL_SIZE - DB_ASYNC_POOL_SIZE), max(0, DB_MAX_OVERFLOW - DB_ASYNC_MAX_OVERFLOW)
+
+
+if DB_ASYNC_POOL_SIZE >= DB_POOL_SIZE or DB_ASYNC_MAX_OVERFLOW > DB_MAX_OVERFLOW:
+    logging.warning(
+        "DB_ASYNC_POOL_SIZE/DB_ASYNC_MAX_OVERFLOW exceed DB_POOL_SIZE/DB_MAX_OVERFLOW; "
+        "each worker may open more than DB_POOL_SIZE + DB_MAX_OVERFLOW connections per server."
+    )
+
+
+def build_engine_kwargs(pgbouncer_mode: bool = DB_PGBOUNCER_MODE, is_async: bool = False) -> dict:
+    """Engine options from config.py (pool sizing, pre-ping, recycle, statement_timeout)."""
+    # pool_pre_ping checks connections before using them (helps with dropped connections),
+    # at the cost of one round-trip per checkout; disable with DB_POOL_PRE_PING=false.
+    kwargs = {"pool_pre_ping": DB_POOL_PRE_PING}
+
+    if pgbouncer_mode:
+        # PgBouncer already pools server connections; a local pool would hold them idle
+        kwargs["poolclass"] = NullPool
+        if is_async:
+            # asyncpg prepared statements must not be reused across PgBouncer transactions
+            kwargs["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            }
+        if DB_STATEMENT_TIMEOUT_MS:
+            logging.warning(
+                "DB_STATEMENT_TIMEOUT_MS is ignored in PgBouncer mode (startup options are rejected); "
+                "set statement_timeout on the database role instead."
+            )
+        return kwargs
+
+    # DB_POOL_SIZE/DB_MAX_OVERFLOW are the worker's budget per server, split between the two engines
+    pool_size, max_overflow = split_pool_budget(is_async)
+    kwargs.update({
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    })
+    if is_async:
+        if DB_STATEMENT_TIMEOUT_MS:
+            kwargs["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        return kwargs
+
+    kwargs["poolclass"] = InstrumentedQueuePool
+    if DB_STATEMENT_TIMEOUT_MS:
+        kwargs["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return kwargs
+
+
+def to_async_url(url: str):
+    """Convert a postgresql:// URL to the asyncpg driver (sslmode becomes asyncpg's ssl argument)."""
+    parsed = make_url(url)
+    connect_args = {}
+    if parsed.get_backend_name() == "postgresql":
+        if "sslmode" in parsed.query:
+            connect_args["ssl"] = parsed.query["sslmode"]
+            parsed = parsed.difference_update_query(["sslmode"])
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed, connect_args
+
+
+engine_kwargs = build_engine_kwargs()
+
+try:
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_kwargs)
+except Exception as e:
+    logging.critical("Failed to create SQLAlchemy engine: %s", str(e))
+    # Re-raise to fail fast in deployment; config.py already enforces DATABASE_URL presence
+    raise
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine for the hot read paths (asyncpg); the sync engine stays for writes, scripts and startup
+ASYNC_DATABASE_URL, _async_connect_args = to_async_url(SQLALCHEMY_DATABASE_URL)
+async_engine_kwargs = build_engine_kwargs(is_async=True)
+if _async_connect_args:
+    async_engine_kwargs["connect_args"] = {**async_engine_kwargs.get("connect_args", {}), **_async_connect_args}
+
+try:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **async_engine_kwargs)
+except Exception as e:
+    logging.critical("Failed to create async SQLAlchemy engine: %s", str(e))
+    raise
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+class ReplicaReadSession(Session):
+    """
+    Read session bound to the replica. A statement that fails with OperationalError
+    (replica gone mid-request) marks the replica unhealthy and is retried once on the
+    primary (info["primary_bind"]), which the session keeps using from then on.
+    """
+
+    def _with_fallback(self, method, *args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        except OperationalError as e:
+            primary = self.info.get("primary_bind")
+            if primary is None or self.bind is primary:
+                raise
+            logging.warning("Read replica failed mid-request, retrying on primary: %s", str(e))
+            replica_health.mark_failed(e)
+            self.rollback()
+            self.bind = primary
+            return method(*args, **kwargs)
+
+    def execute(self, *args, **kwargs):
+        return self._with_fallback(super().execute, *args, **kwargs)
+
+    def scalar(self, *args, **kwargs):
+        return self._with_fallback(super().scalar, *args, **kwargs)
+
+    def scalars(self, *args, **kwargs):
+        return self._with_fallback(super().scalars, *args, **kwargs)
+
+
+# Optional read replica (DATABASE_READ_URL) for read-only endpoints
+read_engine = None
+async_read_engine = None
+ReadSessionLocal = SessionLocal
+AsyncReadSessionLocal = AsyncSessionLocal
+
+if DATABASE_READ_URL:
+    try:
+        read_engine = create_engine(DATABASE_READ_URL, **build_engine_kwargs())
+        _async_read_url, _async_read_connect_args = to_async_url(DATABASE_READ_URL)
+        _async_read_kwargs = build_engine_kwargs(is_async=True)
+        if _async_read_connect_args:
+            _async_read_kwargs["connect_args"] = {**_async_read_kwargs.get("connect_args", {}), **_async_read_connect_args}
+        async_read_engine = create_async_engine(_async_read_url, **_async_read_kwargs)
+    except Exception as e:
+        logging.critical("Failed to create read replica engines: %s", str(e))
+        raise
+    ReadSessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, bind=read_engine,
+        class_=ReplicaReadSession, info={"primary_bind": engine},
+    )
+    AsyncReadSessionLocal = async_sessionmaker(
+        async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False,
+        sync_session_class=ReplicaReadSession, info={"primary_bind": async_engine.sync_engine},
+    )
+
+# Replay lag in seconds; 0 when the replica has applied everything it received
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaHealth:
+    """Replica availability/lag as seen by this worker, re-checked at most every check_interval."""
+
+    def __init__(self, max_lag: float, check_interval: float):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.healthy = False
+        self.lag_seconds = None
+        self.last_error = None
+        self.reads = 0
+        self.fallbacks = 0
+        self._checked_at = None
+        self._checking = False
+        # needs_check/_record run on the event loop and in threadpool threads (get_read_db)
+        self._lock = threading.Lock()
+
+    def needs_check(self) -> bool:
+        """True (and claims the check) if a check is due and no other caller is running one."""
+        with self._lock:
+            if self._checking:
+                return False
+            if self._checked_at is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return False
+            self._checking = True
+            return True
+
+    def _record(self, lag, error=None, finish_check: bool = True) -> None:
+        self.lag_seconds = float(lag) if lag is not None else None
+        # Só o tipo do erro (exposto em /metrics); a mensagem completa vai para o log
+        self.last_error = type(error).__name__ if error else None
+        self.healthy = error is None and (self.lag_seconds or 0) <= self.max_lag
+        if error is None and not self.healthy:
+            logging.warning("Read replica lag %.1fs exceeds %.1fs; using primary.", self.lag_seconds, self.max_lag)
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if finish_check:
+                self._checking = False
+
+    def check(self) -> None:
+        """Run a claimed check (needs_check returned True)."""
+        try:
+            with read_engine.connect() as conn:
+                lag = conn.execute(REPLICA_LAG_SQL).scalar()
+        except Exception as e:
+            logging.warning("Read replica unavailable, using primary: %s", str(e))
+            self._record(None, e)
+            return
+        self._record(lag)
+
+    async def check_async(self) -> None:
+        """Run a claimed check (needs_check returned True)."""
+        try:
+            async with async_read_engine.connect() as conn:
+                lag = (await conn.execute(REPLICA_LAG_SQL)).scalar()
+        except Exception as e:
+            logging.warning("Read replica unavailable, using primary: %s", str(e))
+            self._record(None, e)
+            return
+        self._record(lag)
+
+    def mark_failed(self, error) -> None:
+        """Connection-level failure while serving a read: stop routing there until the next check."""
+        # Leaves an in-flight check (if any) owning the _checking flag
+        self._record(None, error, finish_check=False)
+
+    def choose(self) -> bool:
+        """True to serve this read from the replica, False to fall back to the primary."""
+        if self.healthy:
+            self.reads += 1
+            return True
+        self.fallbacks += 1
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "configured": read_engine is not None,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "last_error": self.last_error,
+            "reads": self.reads,
+            "fallbacks": self.fallbacks,
+        }
+
+
+replica_health = ReplicaHealth(DATABASE_READ_MAX_LAG_SECONDS, DATABASE_READ_CHECK_INTERVAL_SECONDS)
+
+Base = declarative_base()
+
+
+def pool_metrics(pool=None, stats: PoolStats = None) -> dict:
+    """Checked-out / overflow / wait statistics for the engine's pool."""
+    pool = pool or engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    result = {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
+    if stats is not None:
+        result.update(stats.snapshot())
+    return result
+
+
+metrics.register("db_pool", lambda: pool_metrics(engine.pool, pool_stats))
+metrics.register("db_pool_async", lambda: pool_metrics(async_engine.sync_engine.pool))
+metrics.register("db_read_replica", replica_health.stats)
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db():
+    """Read-only session: the replica when configured and healthy, otherwise the primary."""
+    if read_engine is None:
+        yield from get_db()
+        return
+    if replica_health.needs_check():
+        replica_health.check()
+    if not replica_health.choose():
+        yield from get_db()
+        return
+    db = ReadSessionLocal()
+    try:
+        yield db
+    except DBAPIError as e:
+        if e.connection_invalidated:
+            replica_health.mark_failed(e)
+        raise
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    """Async read-only session: the replica when configured and healthy, otherwise the primary."""
+    if async_read_engine is not None and replica_health.needs_check():
+        await replica_health.check_async()
+    if async_read_engine is None or not replica_health.choose():
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    async with AsyncReadSessionLocal() as db:
+        try:
+            yield db
+        except DBAPIError as e:
+            if e.connection_invalidated:
+                replica_health.mark_failed(e)
+            raise
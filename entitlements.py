@@ -0,0 +1,65 @@
+"""
+Direito de acesso dos assinantes às edições.
+
+`users.access_until` guarda o fim da assinatura vigente mais longa do usuário.
+Ele é estendido na mesma transação que cria a assinatura (create_subscription,
+approve_subscription_request) e limpo pela manutenção periódica quando vence.
+Assim a verificação de acesso é só uma comparação com o usuário já carregado,
+sem consulta, e pode ser aplicada a uma lista inteira de edições.
+Administradores têm acesso a todas as edições, como os assinantes.
+"""
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import case, or_, update
+from sqlalchemy.orm import Session
+
+from models import Jornal, User, UserType
+
+
+def extend_access(db: Session, user_id: int, end_date: datetime) -> None:
+    """Estende users.access_until até end_date (nunca o reduz); não faz commit"""
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(access_until=case(
+            (or_(User.access_until.is_(None), User.access_until < end_date), end_date),
+            else_=User.access_until,
+        ))
+    )
+
+
+def _as_utc(dt: datetime) -> datetime:
+    # Datas sem fuso (SQLite, datetime.utcnow()) são UTC
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def has_active_subscription(user: User, now: Optional[datetime] = None) -> bool:
+    """Verifica se o usuário tem uma assinatura vigente"""
+    if user.access_until is None:
+        return False
+    return _as_utc(user.access_until) > (now or datetime.now(timezone.utc))
+
+
+def has_full_access(user: User, now: Optional[datetime] = None) -> bool:
+    """Acesso a todas as edições: administradores e assinantes com assinatura vigente"""
+    return user.tipo_usuario == UserType.ADMIN or has_active_subscription(user, now)
+
+
+def is_free_edition(jornal: Jornal, now: Optional[datetime] = None) -> bool:
+    """A edição do dia atual é de acesso gratuito"""
+    today = (now or datetime.now(timezone.utc)).date()
+    return _as_utc(jornal.data_publicacao).date() == today
+
+
+def access_flags(user: User, jornais: Iterable[Jornal], now: Optional[datetime] = None) -> Dict[int, bool]:
+    """has_access de cada jornal de uma listagem, avaliando a assinatura uma única vez"""
+    now = now or datetime.now(timezone.utc)
+    full_access = has_full_access(user, now)
+    return {jornal.id: full_access or is_free_edition(jornal, now) for jornal in jornais}
+
+
+def can_access(user: User, jornal: Jornal, now: Optional[datetime] = None) -> bool:
+    """Verifica se o usuário tem acesso ao jornal (sem consultar o banco)"""
+    now = now or datetime.now(timezone.utc)
+    return has_full_access(user, now) or is_free_edition(jornal, now)
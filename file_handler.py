@@ -1,145 +1,372 @@
-import os
-import uuid
-from fastapi import UploadFile, HTTPException
-from config import UPLOAD_DIR, MAX_FILE_SIZE
-from typing import Tuple
-
-# Tipos de arquivo permitidos
-ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"}
-ALLOWED_PDF_TYPES = {"application/pdf"}
-
-def create_upload_directories():
-    """Cria os diretórios de upload se não existirem"""
-    os.makedirs(f"{UPLOAD_DIR}/covers", exist_ok=True)
-    os.makedirs(f"{UPLOAD_DIR}/pdfs", exist_ok=True)
-
-def validate_file_size(file: UploadFile) -> None:
-    """Valida o tamanho do arquivo"""
-    if file.size and file.size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=413,
-            detail=f"Arquivo muito grande. Tamanho máximo permitido: {MAX_FILE_SIZE // (1024*1024)}MB"
-        )
-
-def validate_image_file(file: UploadFile) -> None:
-    """Valida se o arquivo é uma imagem válida"""
-    validate_file_size(file)
-    
-    if file.content_type not in ALLOWED_IMAGE_TYPES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Tipo de arquivo não permitido para capa. Tipos aceitos: {', '.join(ALLOWED_IMAGE_TYPES)}"
-        )
-
-def validate_pdf_file(file: UploadFile) -> None:
-    """Valida se o arquivo é um PDF válido"""
-    validate_file_size(file)
-    
-    if file.content_type not in ALLOWED_PDF_TYPES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Tipo de arquivo não permitido para PDF. Tipo aceito: {', '.join(ALLOWED_PDF_TYPES)}"
-        )
-
-def generate_unique_filename(original_filename: str) -> str:
-    """Gera um nome único para o arquivo"""
-    file_extension = os.path.splitext(original_filename)[1]
-    unique_id = str(uuid.uuid4())
-    return f"{unique_id}{file_extension}"
-
-async def save_uploaded_file(file: UploadFile, file_type: str) -> str:
-    """
-    Salva arquivo enviado e retorna o caminho relativo
-    
-    Args:
-        file: Arquivo enviado
-        file_type: Tipo do arquivo ('cover' ou 'pdf')
-    
-    Returns:
-        str: Caminho relativo do arquivo salvo
-    """
-    create_upload_directories()
-    
-    # Valida o arquivo baseado no tipo
-    if file_type == "cover":
-        validate_image_file(file)
-        subfolder = "covers"
-    elif file_type == "pdf":
-        validate_pdf_file(file)
-        subfolder = "pdfs"
-    else:
-        raise HTTPException(status_code=400, detail="Tipo de arquivo inválido")
-    
-    # Gera nome único
-    unique_filename = generate_unique_filename(file.filename)
-    file_path = os.path.join(UPLOAD_DIR, subfolder, unique_filename)
-    
-    # Salva o arquivo
-    try:
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        # Retorna o caminho relativo com separador POSIX
-        return f"{subfolder}/{unique_filename}"
-    
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao salvar arquivo: {str(e)}"
-        )
-
-def delete_file(file_path: str) -> bool:
-    """
-    Remove um arquivo do sistema
-    
-    Args:
-        file_path: Caminho relativo do arquivo
-    
-    Returns:
-        bool: True se removido com sucesso, False caso contrário
-    """
-    try:
-        full_path = os.path.join(UPLOAD_DIR, file_path)
-        if os.path.exists(full_path):
-            os.remove(full_path)
-            return True
-        return False
-    except Exception:
-        return False
-
-def get_file_url(file_path: str, base_url: str = "https://jdbackend-production.up.railway.app") -> str:
-    """
-    Gera URL completa para acessar o arquivo
-
-    Args:
-        file_path: Caminho relativo do arquivo
-        base_url: URL base da API
-
-    Returns:
-        str: URL completa do arquivo
-    """
-    if not file_path:
-        return ""
-    # Normaliza separadores para URL
-    normalized_path = file_path.replace('\\', '/')
-    return f"{base_url}/files/{normalized_path}"
-
-def get_file_size_mb(file_path: str) -> float:
-    """
-    Obtém o tamanho do arquivo em MB
-    
-    Args:
-        file_path: Caminho relativo do arquivo
-    
-    Returns:
-        float: Tamanho em MB
-    """
-    try:
-        full_path = os.path.join(UPLOAD_DIR, file_path)
-        if os.path.exists(full_path):
-            size_bytes = os.path.getsize(full_path)
-            return round(size_bytes / (1024 * 1024), 2)
-        return 0.0
-    except Exception:
-        return 0.0
+import hashlib
+import os
+import uuid
+import aiofiles
+import aiofiles.os
+from fastapi import UploadFile, HTTPException
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from config import UPLOAD_DIR, MAX_FILE_SIZE, UPLOAD_CHUNK_SIZE, PUBLIC_PDF_FILES
+from models import StoredFile
+from typing import Iterable, NamedTuple, Optional, Tuple
+from signed_urls import sign_file_url
+
+# URL pública da API; as URLs dos arquivos são FILES_URL_PREFIX + caminho relativo
+PUBLIC_BASE_URL = "https://jdbackend-production.up.railway.app"
+FILES_URL_PREFIX = f"{PUBLIC_BASE_URL}/files/"
+
+# Tipos de arquivo permitidos
+ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"}
+ALLOWED_PDF_TYPES = {"application/pdf"}
+
+def create_upload_directories():
+    """Cria os diretórios de upload se não existirem"""
+    os.makedirs(f"{UPLOAD_DIR}/covers", exist_ok=True)
+    os.makedirs(f"{UPLOAD_DIR}/pdfs", exist_ok=True)
+
+def is_safe_relative_path(file_path: str) -> bool:
+    """
+    Caminho relativo com separador POSIX, sem `..`, `.` nem segmentos vazios
+
+    Barras invertidas são recusadas: o banco só guarda caminhos POSIX, e elas
+    passariam por `posixpath.normpath` sem serem tratadas como separador.
+    """
+    if not file_path or "\\" in file_path or "\0" in file_path or file_path.startswith("/"):
+        return False
+    return all(part not in ("", ".", "..") for part in file_path.split("/"))
+
+def fanout_path(file_path: str) -> str:
+    """
+    Caminho no layout em dois níveis: <pasta>/<h[0:2]>/<h[2:4]>/<arquivo>
+
+    `h` é o SHA-256 do nome do arquivo, o que espalha tanto os nomes por
+    conteúdo quanto os UUIDs antigos. Só caminhos exatamente <pasta>/<arquivo>
+    mudam; os demais (inclusive os já nesse layout) voltam iguais.
+    """
+    parts = file_path.split("/")
+    if len(parts) != 2:
+        return file_path
+    subfolder, filename = parts
+    digest = hashlib.sha256(filename.encode("utf-8")).hexdigest()
+    return f"{subfolder}/{digest[:2]}/{digest[2:4]}/{filename}"
+
+def flat_path(file_path: str) -> str:
+    """Caminho no layout antigo, direto na pasta: <pasta>/<arquivo>"""
+    parts = file_path.split("/")
+    if len(parts) != 4:
+        return file_path
+    return f"{parts[0]}/{parts[-1]}"
+
+def resolve_file_path(file_path: str) -> Optional[str]:
+    """
+    Caminho absoluto do arquivo em qualquer um dos layouts, ou None se não existe
+
+    Durante a migração (migrate_upload_layout.py) o banco pode ainda ter o
+    caminho antigo de um arquivo já movido, ou o contrário. Caminhos inseguros
+    (is_safe_relative_path) ou que saiam de UPLOAD_DIR resultam em None.
+    """
+    if not is_safe_relative_path(file_path):
+        return None
+    upload_root = os.path.realpath(UPLOAD_DIR)
+    for candidate in (file_path, fanout_path(file_path), flat_path(file_path)):
+        full_path = os.path.realpath(os.path.join(upload_root, candidate))
+        if os.path.commonpath([upload_root, full_path]) != upload_root:
+            continue
+        if os.path.isfile(full_path):
+            return full_path
+    return None
+
+class SavedUpload(NamedTuple):
+    path: str  # caminho relativo (separador POSIX)
+    size: int
+    sha256: str
+
+def _file_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Arquivo muito grande. Tamanho máximo permitido: {MAX_FILE_SIZE // (1024*1024)}MB"
+    )
+
+def validate_file_size(file: UploadFile) -> None:
+    """Rejeita cedo quando o tamanho é conhecido; o limite é garantido na cópia (stream_to_temp)"""
+    if file.size and file.size > MAX_FILE_SIZE:
+        raise _file_too_large()
+
+def validate_image_file(file: UploadFile) -> None:
+    """Valida se o arquivo é uma imagem válida"""
+    validate_file_size(file)
+    
+    if file.content_type not in ALLOWED_IMAGE_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tipo de arquivo não permitido para capa. Tipos aceitos: {', '.join(ALLOWED_IMAGE_TYPES)}"
+        )
+
+def validate_pdf_file(file: UploadFile) -> None:
+    """Valida se o arquivo é um PDF válido"""
+    validate_file_size(file)
+    
+    if file.content_type not in ALLOWED_PDF_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tipo de arquivo não permitido para PDF. Tipo aceito: {', '.join(ALLOWED_PDF_TYPES)}"
+        )
+
+def content_addressed_filename(sha256: str, original_filename: str) -> str:
+    """Nome do arquivo derivado do conteúdo: uploads idênticos têm o mesmo nome"""
+    file_extension = os.path.splitext(original_filename or "")[1].lower()
+    return f"{sha256}{file_extension}"
+
+def lock_stored_path(db: Session, file_path: str) -> None:
+    """
+    Serializa, no PostgreSQL, quem registra, remove ou migra os bytes de um
+    mesmo arquivo (nos dois layouts); o lock vale até o fim da transação de `db`
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:path))"), {"path": fanout_path(file_path)})
+
+def add_file_reference(db: Session, upload: SavedUpload) -> None:
+    """Registra mais uma referência ao arquivo (cria a linha na primeira); não faz commit"""
+    lock_stored_path(db, upload.path)
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    db.execute(
+        insert(StoredFile)
+        .values(path=upload.path, sha256=upload.sha256, size=upload.size, ref_count=1)
+        .on_conflict_do_update(
+            index_elements=[StoredFile.path],
+            set_={"ref_count": StoredFile.ref_count + 1},
+        )
+    )
+
+async def stream_to_temp(file: UploadFile, directory: str) -> Tuple[str, int, str]:
+    """
+    Copia o upload para um ".part" com nome único em `directory`, em blocos
+    de UPLOAD_CHUNK_SIZE e sem bloquear o event loop
+
+    Quando a rota roda, o Starlette já recebeu o corpo da requisição e guardou
+    o arquivo num SpooledTemporaryFile; esta cópia lê esse temporário uma vez
+    só, calculando o SHA-256 e o tamanho bloco a bloco. O limite MAX_FILE_SIZE
+    vale para os bytes copiados (não interrompe o recebimento), e em qualquer
+    falha o arquivo parcial é removido. O nome único evita que uploads
+    simultâneos do mesmo conteúdo se atrapalhem.
+
+    Returns:
+        Tuple[str, int, str]: Caminho do arquivo parcial, tamanho em bytes e SHA-256 (hex)
+    """
+    partial_path = os.path.join(directory, f"{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(partial_path, "wb") as buffer:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise _file_too_large()
+                digest.update(chunk)
+                await buffer.write(chunk)
+    except BaseException:
+        await _remove_partial(partial_path)
+        raise
+    return partial_path, size, digest.hexdigest()
+
+async def publish_file(partial_path: str, full_path: str) -> bool:
+    """
+    Renomeia o arquivo parcial para `full_path`; True se publicou
+
+    Se `full_path` já existe (mesmo nome, mesmo conteúdo, vindo de outro
+    upload), o parcial é descartado.
+    """
+    try:
+        if await aiofiles.os.path.exists(full_path):
+            await aiofiles.os.remove(partial_path)
+            return False
+        await aiofiles.os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        await aiofiles.os.replace(partial_path, full_path)
+        return True
+    except BaseException:
+        await _remove_partial(partial_path)
+        raise
+
+async def _remove_partial(partial_path: str) -> None:
+    try:
+        await aiofiles.os.remove(partial_path)
+    except OSError:
+        pass
+
+async def write_upload(file: UploadFile, relative_path: str) -> bool:
+    """Grava o upload em `relative_path` se os bytes ainda não estão em disco; True se gravou"""
+    full_path = os.path.join(UPLOAD_DIR, relative_path)
+    if await aiofiles.os.path.exists(full_path):
+        return False
+    await file.seek(0)
+    await aiofiles.os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    partial_path, _, _ = await stream_to_temp(file, os.path.dirname(full_path))
+    return await publish_file(partial_path, full_path)
+
+async def save_upload(file: UploadFile, file_type: str) -> SavedUpload:
+    """
+    Valida e salva o arquivo enviado, endereçado pelo conteúdo
+
+    O upload (já recebido pelo Starlette) é copiado uma vez para um arquivo
+    temporário da pasta, com o SHA-256 calculado durante a cópia, e renomeado para <pasta>/<sha256><extensão>;
+    se um upload idêntico já está em disco, o temporário é descartado. Nada é
+    registrado no banco: quem chama
+    registra a referência (add_file_reference) na transação que grava o
+    jornal e, depois do commit, chama restore_upload.
+
+    Args:
+        file: Arquivo enviado
+        file_type: Tipo do arquivo ('cover' ou 'pdf')
+
+    Returns:
+        SavedUpload: Caminho relativo, tamanho e SHA-256 do arquivo salvo
+    """
+    create_upload_directories()
+    
+    # Valida o arquivo baseado no tipo
+    if file_type == "cover":
+        validate_image_file(file)
+        subfolder = "covers"
+    elif file_type == "pdf":
+        validate_pdf_file(file)
+        subfolder = "pdfs"
+    else:
+        raise HTTPException(status_code=400, detail="Tipo de arquivo inválido")
+    
+    try:
+        partial_path, size, sha256 = await stream_to_temp(file, os.path.join(UPLOAD_DIR, subfolder))
+        filename = content_addressed_filename(sha256, file.filename)
+        relative_path = fanout_path(f"{subfolder}/{filename}")
+        await publish_file(partial_path, os.path.join(UPLOAD_DIR, relative_path))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao salvar arquivo: {str(e)}"
+        )
+    
+    # Caminho relativo com separador POSIX
+    return SavedUpload(relative_path, size, sha256)
+
+async def restore_upload(file: UploadFile, upload: SavedUpload) -> None:
+    """
+    Chamada depois do commit da referência: grava os bytes de novo se um
+    remove_unreferenced_files concorrente os apagou entre save_upload e
+    add_file_reference (o lock do caminho garante que ele já terminou)
+    """
+    await write_upload(file, upload.path)
+
+def release_file(db: Session, file_path: str) -> Optional[str]:
+    """
+    Remove uma referência ao arquivo; não faz commit nem apaga nada do disco
+
+    Arquivos anteriores ao armazenamento por conteúdo (sem linha em
+    stored_files) têm uma única referência. Um caminho no layout antigo cuja
+    linha já foi movida por migrate_upload_layout.py conta na linha nova.
+
+    Returns:
+        Optional[str]: `file_path` se foi a última referência (os bytes devem sair
+        do disco com remove_unreferenced_files depois do commit), senão None
+    """
+    lock_stored_path(db, file_path)
+    stored = None
+    for candidate in dict.fromkeys((file_path, fanout_path(file_path))):
+        stored = db.query(StoredFile).filter(StoredFile.path == candidate).with_for_update().first()
+        if stored is not None:
+            break
+    if stored is not None:
+        stored.ref_count -= 1
+        if stored.ref_count > 0:
+            db.flush()
+            return None
+        db.delete(stored)
+        db.flush()
+    return file_path
+
+def remove_unreferenced_files(db: Session, file_paths: Iterable[str]) -> int:
+    """
+    Apaga do disco os arquivos que não têm linha em stored_files
+
+    Chamada depois do commit que liberou as referências (release_file) ou
+    quando a transação que as registraria falhou. Cada caminho é conferido de
+    novo sob o lock do caminho, então um upload do mesmo conteúdo registrado
+    nesse meio tempo mantém o arquivo. Faz commit (libera os locks).
+
+    Returns:
+        int: Quantidade de arquivos removidos
+    """
+    removed = 0
+    for file_path in file_paths:
+        try:
+            lock_stored_path(db, file_path)
+            referenced = db.query(StoredFile.path).filter(
+                StoredFile.path.in_([file_path, fanout_path(file_path)])
+            ).first()
+            if referenced is None:
+                full_path = resolve_file_path(file_path)
+                if full_path is not None:
+                    os.remove(full_path)
+                    removed += 1
+        except OSError:
+            pass
+        finally:
+            db.commit()
+    return removed
+
+def get_file_url(file_path: str, base_url: str = PUBLIC_BASE_URL,
+                 user_id: Optional[int] = None, jornal_id: Optional[int] = None) -> str:
+    """
+    Gera URL completa para acessar o arquivo
+
+    Args:
+        file_path: Caminho relativo do arquivo
+        base_url: URL base da API
+        user_id, jornal_id: Se informados, a URL é assinada para esse usuário e
+            jornal e expira em SIGNED_URL_TTL_SECONDS (o acesso deve ter sido verificado)
+
+    Returns:
+        str: URL completa do arquivo
+    """
+    if not file_path:
+        return ""
+    if user_id is not None and jornal_id is not None:
+        return sign_file_url(base_url, user_id, jornal_id, file_path)
+    # Normaliza separadores para URL
+    normalized_path = file_path.replace('\\', '/')
+    return f"{base_url}/files/{normalized_path}"
+
+def get_pdf_url(jornal_id: int, file_path: str, base_url: str = PUBLIC_BASE_URL) -> str:
+    """
+    URL pela qual o PDF de um jornal é baixado
+
+    Com PUBLIC_PDF_FILES é o arquivo em /files; senão, a rota que verifica o acesso.
+    """
+    if not file_path:
+        return ""
+    if PUBLIC_PDF_FILES:
+        return get_file_url(file_path, base_url)
+    return f"{base_url}/user/jornais/{jornal_id}/pdf"
+
+def get_file_size_mb(file_path: str) -> float:
+    """
+    Obtém o tamanho do arquivo em MB
+    
+    Args:
+        file_path: Caminho relativo do arquivo
+    
+    Returns:
+        float: Tamanho em MB
+    """
+    try:
+        full_path = resolve_file_path(file_path)
+        if full_path is not None:
+            size_bytes = os.path.getsize(full_path)
+            return round(size_bytes / (1024 * 1024), 2)
+        return 0.0
+    except Exception:
+        return 0.0
@@ -0,0 +1,183 @@
+"""
+Entrega de arquivos com requisições condicionais e parciais (Range).
+
+`file_response` devolve o arquivo inteiro (200), um intervalo de bytes (206),
+416 para intervalos fora do arquivo ou 304 quando o cliente já tem a versão
+atual (If-None-Match / If-Modified-Since). `If-Range` faz o cliente receber o
+arquivo inteiro se ele mudou desde o download interrompido.
+
+Os bytes são enviados com a extensão ASGI `http.response.zerocopysend`
+(sendfile) quando o servidor a oferece; caso contrário, em blocos lidos com
+aiofiles. Só um intervalo por requisição é atendido: pedidos com vários
+intervalos recebem o arquivo inteiro, o que o RFC 9110 permite.
+"""
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+import aiofiles
+import anyio.to_thread
+from fastapi import HTTPException, Request, Response
+from starlette.types import Receive, Scope, Send
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class FileRangeResponse(Response):
+    """Envia os bytes [start, start + length) de um arquivo"""
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, path: str, start: int, length: int, status_code: int,
+                 headers: Dict[str, str], media_type: str, send_body: bool = True):
+        self.path = path
+        self.start = start
+        self.length = length
+        self.status_code = status_code
+        self.media_type = media_type
+        self.send_body = send_body
+        self.background = None
+        self.init_headers({**headers, "Content-Length": str(length)})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+            # open/close em thread, como o aiofiles do caminho comum: não bloqueiam o event loop
+            file = await anyio.to_thread.run_sync(open, self.path, "rb")
+            try:
+                await send({
+                    "type": ZEROCOPY_EXTENSION,
+                    "file": file,
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False,
+                })
+            finally:
+                await anyio.to_thread.run_sync(file.close)
+            return
+        async with aiofiles.open(self.path, "rb") as file:
+            await file.seek(self.start)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    # Arquivo encurtado durante o envio: encerra com o que foi lido
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """ETag forte a partir da data de modificação e do tamanho"""
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """(início, tamanho) do intervalo pedido; None para ignorar o cabeçalho
+
+    Levanta HTTPException 416 se o intervalo não existe no arquivo.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        # Sintaxe inválida ou vários intervalos: responde com o arquivo inteiro
+        return None
+    first, last = match.groups()
+    if first == "":
+        # bytes=-N: os últimos N bytes
+        suffix = int(last)
+        if suffix == 0:
+            raise _range_not_satisfiable(size)
+        start = max(size - suffix, 0)
+        return start, size - start
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise _range_not_satisfiable(size)
+    if end < start:
+        return None
+    return start, end - start + 1
+
+
+def _range_not_satisfiable(size: int) -> HTTPException:
+    return HTTPException(
+        status_code=416,
+        detail="Intervalo solicitado fora do arquivo",
+        headers={"Content-Range": f"bytes */{size}"},
+    )
+
+
+def _etag_in(header: str, etag: str) -> bool:
+    # Comparação fraca (If-None-Match): W/"x" equivale a "x"
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    return since is not None and int(mtime) <= since.timestamp()
+
+
+def _if_range_matches(header: str, etag: str, mtime: float) -> bool:
+    header = header.strip()
+    if header.startswith('"') or header.startswith("W/"):
+        # If-Range exige comparação forte
+        return header == etag
+    try:
+        return parsedate_to_datetime(header).timestamp() == int(mtime)
+    except (TypeError, ValueError):
+        return False
+
+
+def file_response(request: Request, full_path: Optional[str], media_type: str,
+                  headers: Optional[Dict[str, str]] = None) -> Response:
+    """Resposta para GET/HEAD de um arquivo, respeitando Range e cabeçalhos condicionais
+
+    `full_path` None (arquivo não localizado) resulta em 404.
+    """
+    try:
+        stat_result = os.stat(full_path) if full_path is not None else None
+    except FileNotFoundError:
+        stat_result = None
+    if stat_result is None:
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+
+    size = stat_result.st_size
+    etag = file_etag(stat_result)
+    headers = {
+        **(headers or {}),
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = _etag_in(if_none_match, etag)
+    else:
+        not_modified = if_modified_since is not None and _not_modified_since(if_modified_since, stat_result.st_mtime)
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    send_body = request.method != "HEAD"
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or _if_range_matches(if_range, etag, stat_result.st_mtime)):
+        requested = parse_range(range_header, size)
+        if requested is not None:
+            start, length = requested
+            headers["Content-Range"] = f"bytes {start}-{start + length - 1}/{size}"
+            return FileRangeResponse(full_path, start, length, 206, headers, media_type, send_body)
+
+    return FileRangeResponse(full_path, 0, size, 200, headers, media_type, send_body)
@@ -0,0 +1,110 @@
+"""
+Pool limitado para o hashing de senhas (pbkdf2_sha256) fora do event loop.
+
+O hashlib libera o GIL durante o pbkdf2, então threads dedicadas bastam para
+que um pico de logins aumente apenas a latência de login, e não a de toda a
+API. A fila é limitada: pedidos acima da capacidade, ou que esperam mais do
+que o timeout por uma thread livre, recebem 503 com Retry-After.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from fastapi import HTTPException, status
+
+import metrics
+from config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS
+
+
+class HashPool:
+    """Executa funções de hash num ThreadPoolExecutor com fila limitada"""
+
+    def __init__(self, workers: int, max_queue: int, queue_timeout: float):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = None  # criado no primeiro uso, já dentro do event loop
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._wait_seconds_total = 0.0
+
+    def _busy(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, tente novamente em instantes",
+            headers={"Retry-After": str(max(1, int(self.queue_timeout)))},
+        )
+
+    async def run(self, fn: Callable, *args):
+        with self._lock:
+            if self._waiting + self._running >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise self._busy()
+            self._waiting += 1
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._waiting -= 1
+                self._timed_out += 1
+            raise self._busy()
+        except BaseException:
+            # Requisição cancelada na fila (cliente desconectou): devolve a vaga
+            with self._lock:
+                self._waiting -= 1
+            raise
+
+        with self._lock:
+            self._waiting -= 1
+            self._running += 1
+            self._wait_seconds_total += time.perf_counter() - started
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # A vaga só volta quando a thread termina: se a requisição for cancelada
+        # durante o hash, a thread continua ocupada e o limite de workers vale
+        future.add_done_callback(lambda _: self._release_threadsafe(loop))
+        return await asyncio.wrap_future(future)
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # Event loop já encerrado (desligamento do worker)
+            pass
+
+    def _release(self) -> None:
+        self._slots.release()
+        with self._lock:
+            self._running -= 1
+            self._completed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self._waiting,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "avg_wait_ms": round(1000 * self._wait_seconds_total / self._completed, 3) if self._completed else 0.0,
+            }
+
+
+hash_pool = HashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS)
+metrics.register("password_hash", hash_pool.stats)
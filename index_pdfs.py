@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Indexa o texto dos PDFs do acervo para a busca textual (backfill)
+
+    python index_pdfs.py            # indexa os jornais ativos ainda não indexados
+    python index_pdfs.py --all      # reindexa todos os jornais ativos
+"""
+import argparse
+import logging
+
+from sqlalchemy import select
+
+from database import SessionLocal
+from models import Jornal
+from pdf_index import index_jornal_pdf
+
+
+def main():
+    """Função principal do comando de indexação"""
+    parser = argparse.ArgumentParser(description="Indexação do texto dos PDFs dos jornais")
+    parser.add_argument("--all", action="store_true", help="reindexa também os jornais já indexados")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    query = select(Jornal.id, Jornal.arquivopdf).where(Jornal.is_active == True).order_by(Jornal.id)
+    if not args.all:
+        query = query.where(Jornal.pdf_indexed_at.is_(None))
+
+    db = SessionLocal()
+    try:
+        pending = db.execute(query).all()
+    finally:
+        db.close()
+
+    indexed = 0
+    for position, (jornal_id, arquivopdf) in enumerate(pending, start=1):
+        if index_jornal_pdf(jornal_id, arquivopdf):
+            indexed += 1
+        if position % 50 == 0:
+            logging.info("%d/%d jornais processados", position, len(pending))
+
+    print(f"✅ {indexed} de {len(pending)} jornais indexados")
+
+
+if __name__ == "__main__":
+    main()
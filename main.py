@@ -1,157 +1,235 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-import uvicorn
-import os
-
-from database import get_db, engine, SessionLocal
-from models import Base, User, Jornal, Subscription, UserType
-from schemas import UserCreate, UserLogin, JornalCreate, JornalUpdate, UserUpdate
-from auth import create_access_token, verify_token, get_password_hash, verify_password
-from admin_routes import router as admin_router
-from user_routes import router as user_router
-from config import UPLOAD_DIR
-
-import time
-import logging
-from sqlalchemy.exc import OperationalError
-
-
-def create_tables_with_retry(retries: int = 5, base=Base, engine=engine):
-    """Attempt to create DB tables with retries and exponential backoff.
-
-    Raises the last exception if all attempts fail.
-    """
-    delay = 1
-    last_exc = None
-    for attempt in range(1, retries + 1):
-        try:
-            base.metadata.create_all(bind=engine)
-            logging.info("Database tables created (or already exist).")
-            return
-        except Exception as e:
-            last_exc = e
-            logging.error(
-                "Attempt %d/%d: failed to create tables: %s",
-                attempt,
-                retries,
-                str(e),
-            )
-            # If it's an operational error (like DNS failure), wait and retry
-            time.sleep(delay)
-            delay *= 2
-    # all attempts failed
-    logging.critical("Could not create database tables after %d attempts.", retries)
-    # Re-raise the last exception so the platform can surface the failure
-    raise last_exc
-
-app = FastAPI(title="Jornal Destaque API", version="1.0.0")
-
-
-@app.on_event("startup")
-def startup_event():
-    """Ensure DB tables exist on startup. Use retries to tolerate transient DNS/DB startup issues (e.g., Railway)."""
-    try:
-        create_tables_with_retry()
-    except Exception as e:
-        # Log helpful advice for deployment platforms like Railway
-        import sys
-
-        logging.critical(
-            "Failed to initialize database on startup: %s",
-            str(e),
-        )
-        logging.critical(
-            "Check that DATABASE_URL env var is set and that the host is reachable (for Railway, ensure you have the correct DATABASE_URL and the addon/database is running)."
-        )
-        # Re-raise so the process exits with non-zero status and the platform can restart or surface the issue
-        raise
-
-# Configurar CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Incluir routers
-app.include_router(admin_router, prefix="/admin", tags=["admin"])
-app.include_router(user_router, prefix="/user", tags=["user"])
-
-# Servir arquivos estáticos
-if os.path.exists(UPLOAD_DIR):
-    app.mount("/files", StaticFiles(directory=UPLOAD_DIR), name="files")
-
-security = HTTPBearer()
-
-@app.on_event("startup")
-def ensure_default_admin():
-    """Create a default admin user if none exists. Uses env vars for credentials.
-
-    ENV:
-      ADMIN_NAME, ADMIN_PHONE, ADMIN_EMAIL, ADMIN_PASSWORD
-    Defaults are safe for local dev but should be overridden in production.
-    """
-    admin_name = os.getenv("ADMIN_NAME")
-    admin_phone = os.getenv("ADMIN_PHONE")
-    admin_email = os.getenv("ADMIN_EMAIL")
-    admin_password = os.getenv("ADMIN_PASSWORD")
-
-    # Don't attempt to create an admin unless email and password are provided deliberately
-    if not admin_email or not admin_password:
-        logging.info("ADMIN_EMAIL or ADMIN_PASSWORD not provided — skipping automatic admin creation.")
-        return
-
-    # bcrypt has a 72-byte input limit; ensure we don't pass longer passwords to the hasher
-    pw_bytes = admin_password.encode("utf-8")
-    if len(pw_bytes) > 72:
-        logging.warning(
-            "ADMIN_PASSWORD is longer than 72 bytes; truncating to avoid bcrypt errors."
-        )
-        # Truncate bytes to 72 and decode safely; use 'ignore' to avoid partial multibyte errors
-        admin_password = pw_bytes[:72].decode("utf-8", errors="ignore")
-
-    db = SessionLocal()
-    try:
-        existing_admin = db.query(User).filter(User.tipo_usuario == UserType.ADMIN).first()
-        if existing_admin:
-            return
-
-        # If there's no admin, create one or promote existing email to admin
-        user = db.query(User).filter(User.email == admin_email).first()
-        if user:
-            user.tipo_usuario = UserType.ADMIN
-            # Update password if provided
-            if admin_password:
-                user.senha = get_password_hash(admin_password)
-        else:
-            user = User(
-                nome=admin_name,
-                telefone=admin_phone,
-                email=admin_email,
-                senha=get_password_hash(admin_password),
-                tipo_usuario=UserType.ADMIN,
-                is_active=True,
-            )
-            db.add(user)
-        db.commit()
-    finally:
-        db.close()
-
-@app.get("/")
-async def root():
-    return {"message": "Jornal Destaque API"}
-
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
-
-if __name__ == "__main__":
-    port = int(os.getenv("PORT", "8000"))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+import uvicorn
+import hmac
+import mimetypes
+import os
+
+from database import get_db, engine, SessionLocal
+from models import Base, User, Jornal, Subscription, UserType
+from schemas import UserCreate, UserLogin, JornalCreate, JornalUpdate, UserUpdate
+from auth import create_access_token, verify_token, get_password_hash, verify_password
+from admin_routes import router as admin_router
+from user_routes import router as user_router
+from config import PUBLIC_PDF_FILES, SESSION_REAPER_INTERVAL_SECONDS, AUTH_STATELESS_MODE, RUN_MIGRATIONS_ON_STARTUP, METRICS_TOKEN
+from migrations import pending_migrations, run_migrations
+from maintenance import maintenance_loop
+from session_epochs import session_epochs, session_epoch_refresh_loop
+from pagination import NEXT_CURSOR_HEADER
+from file_handler import is_safe_relative_path, resolve_file_path
+from file_streaming import file_response
+import metrics
+
+import asyncio
+import time
+import logging
+from sqlalchemy.exc import OperationalError
+
+
+def create_tables_with_retry(retries: int = 5, base=Base, engine=engine):
+    """Attempt to create DB tables and apply migrations with retries and exponential backoff.
+
+    Raises the last exception if all attempts fail.
+    """
+    delay = 1
+    last_exc = None
+    for attempt in range(1, retries + 1):
+        try:
+            applied = run_migrations(engine, base.metadata)
+            logging.info("Database tables created (or already exist).")
+            if applied:
+                logging.info("Applied migrations: %s", ", ".join(applied))
+            return
+        except Exception as e:
+            last_exc = e
+            logging.error(
+                "Attempt %d/%d: failed to create tables: %s",
+                attempt,
+                retries,
+                str(e),
+            )
+            # If it's an operational error (like DNS failure), wait and retry
+            time.sleep(delay)
+            delay *= 2
+    # all attempts failed
+    logging.critical("Could not create database tables after %d attempts.", retries)
+    # Re-raise the last exception so the platform can surface the failure
+    raise last_exc
+
+app = FastAPI(title="Jornal Destaque API", version="1.0.0")
+
+
+@app.on_event("startup")
+def startup_event():
+    """Check the schema on startup; DDL runs offline via `python migrate.py`.
+
+    With RUN_MIGRATIONS_ON_STARTUP=true (local development) tables are created and migrations
+    applied here instead, with retries to tolerate transient DNS/DB startup issues (e.g., Railway).
+    """
+    if not RUN_MIGRATIONS_ON_STARTUP:
+        try:
+            pending = pending_migrations(engine)
+        except Exception as e:
+            logging.error("Could not check schema migrations on startup: %s", str(e))
+            return
+        if pending:
+            logging.critical(
+                "Database schema is behind (pending migrations: %s). Run `python migrate.py` before starting the API.",
+                ", ".join(pending),
+            )
+        return
+    try:
+        create_tables_with_retry()
+    except Exception as e:
+        # Log helpful advice for deployment platforms like Railway
+        import sys
+
+        logging.critical(
+            "Failed to initialize database on startup: %s",
+            str(e),
+        )
+        logging.critical(
+            "Check that DATABASE_URL env var is set and that the host is reachable (for Railway, ensure you have the correct DATABASE_URL and the addon/database is running)."
+        )
+        # Re-raise so the process exits with non-zero status and the platform can restart or surface the issue
+        raise
+
+@app.on_event("startup")
+async def start_maintenance():
+    """Start the periodic maintenance task (token_sessions cleanup) for this worker."""
+    if SESSION_REAPER_INTERVAL_SECONDS <= 0:
+        logging.info("SESSION_REAPER_INTERVAL_SECONDS <= 0 — maintenance task disabled.")
+        return
+    app.state.maintenance_task = asyncio.create_task(maintenance_loop())
+
+@app.on_event("startup")
+async def start_session_epochs():
+    """In AUTH_STATELESS_MODE, load the per-user session epochs and keep them refreshed."""
+    if not AUTH_STATELESS_MODE:
+        return
+    try:
+        await run_in_threadpool(session_epochs.refresh)
+    except Exception as e:
+        # Until a refresh succeeds get_current_user keeps validating against token_sessions
+        logging.error("Initial session epoch load failed: %s", str(e))
+    app.state.session_epoch_task = asyncio.create_task(session_epoch_refresh_loop())
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for name in ("maintenance_task", "session_epoch_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+
+# Configurar CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Accept-Ranges", "Content-Range"],
+)
+
+# Incluir routers
+app.include_router(admin_router, prefix="/admin", tags=["admin"])
+app.include_router(user_router, prefix="/user", tags=["user"])
+
+
+security = HTTPBearer()
+
+@app.on_event("startup")
+def ensure_default_admin():
+    """Create a default admin user if none exists. Uses env vars for credentials.
+
+    ENV:
+      ADMIN_NAME, ADMIN_PHONE, ADMIN_EMAIL, ADMIN_PASSWORD
+    Defaults are safe for local dev but should be overridden in production.
+    """
+    admin_name = os.getenv("ADMIN_NAME")
+    admin_phone = os.getenv("ADMIN_PHONE")
+    admin_email = os.getenv("ADMIN_EMAIL")
+    admin_password = os.getenv("ADMIN_PASSWORD")
+
+    # Don't attempt to create an admin unless email and password are provided deliberately
+    if not admin_email or not admin_password:
+        logging.info("ADMIN_EMAIL or ADMIN_PASSWORD not provided — skipping automatic admin creation.")
+        return
+
+    # bcrypt has a 72-byte input limit; ensure we don't pass longer passwords to the hasher
+    pw_bytes = admin_password.encode("utf-8")
+    if len(pw_bytes) > 72:
+        logging.warning(
+            "ADMIN_PASSWORD is longer than 72 bytes; truncating to avoid bcrypt errors."
+        )
+        # Truncate bytes to 72 and decode safely; use 'ignore' to avoid partial multibyte errors
+        admin_password = pw_bytes[:72].decode("utf-8", errors="ignore")
+
+    db = SessionLocal()
+    try:
+        existing_admin = db.query(User).filter(User.tipo_usuario == UserType.ADMIN).first()
+        if existing_admin:
+            return
+
+        # If there's no admin, create one or promote existing email to admin
+        user = db.query(User).filter(User.email == admin_email).first()
+        if user:
+            user.tipo_usuario = UserType.ADMIN
+            # Update password if provided
+            if admin_password:
+                user.senha = get_password_hash(admin_password)
+        else:
+            user = User(
+                nome=admin_name,
+                telefone=admin_phone,
+                email=admin_email,
+                senha=get_password_hash(admin_password),
+                tipo_usuario=UserType.ADMIN,
+                is_active=True,
+            )
+            db.add(user)
+        db.commit()
+    finally:
+        db.close()
+
+@app.get("/")
+async def root():
+    return {"message": "Jornal Destaque API"}
+
+@app.get("/health")
+async def health_check():
+    return {"status": "healthy"}
+
+@app.api_route("/files/{file_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_file(file_path: str, request: Request):
+    """Arquivos estáticos: só as capas (PDFs também com PUBLIC_PDF_FILES), em qualquer layout de pastas"""
+    if not is_safe_relative_path(file_path):
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not (PUBLIC_PDF_FILES or file_path.startswith("covers/")):
+        # PDFs passam por /user/jornais/{id}/pdf, que verifica o acesso
+        raise HTTPException(status_code=404, detail="Not Found")
+    return file_response(
+        request,
+        resolve_file_path(file_path),
+        mimetypes.guess_type(file_path)[0] or "application/octet-stream",
+    )
+
+metrics_bearer = HTTPBearer(auto_error=False)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_snapshot(credentials: HTTPAuthorizationCredentials = Depends(metrics_bearer)):
+    """Métricas operacionais deste worker (pool de hashing, etc.); exige METRICS_TOKEN"""
+    if not METRICS_TOKEN or credentials is None or not hmac.compare_digest(
+        credentials.credentials.encode("utf-8"), METRICS_TOKEN.encode("utf-8")
+    ):
+        # Sem o token configurado a rota não existe para ninguém
+        raise HTTPException(status_code=404, detail="Not Found")
+    return metrics.snapshot()
+
+if __name__ == "__main__":
+    port = int(os.getenv("PORT", "8000"))
+    uvicorn.run(app, host="0.0.0.0", port=port)
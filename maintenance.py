@@ -0,0 +1,118 @@
+"""
+Tarefas periódicas de manutenção executadas dentro do processo da API.
+
+Hoje: remoção das linhas antigas de `token_sessions` (expiradas ou inativas há
+mais tempo que a janela de retenção), em lotes pequenos com commit por lote
+para nunca segurar locks longos, e o vencimento das assinaturas (desativa as
+vencidas e limpa `users.access_until`/`tipo_subscricao`). Com vários workers,
+apenas o que obtiver o advisory lock do PostgreSQL executa o ciclo.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, or_, select, text, update
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+from config import SESSION_REAPER_INTERVAL_SECONDS, SESSION_REAPER_BATCH_SIZE, SESSION_RETENTION_DAYS
+from database import engine
+from models import Subscription, TokenSession, User
+
+MAINTENANCE_LOCK_ID = 7_351_903
+
+_stats = {
+    "runs": 0,
+    "skipped": 0,
+    "errors": 0,
+    "last_run_at": None,
+    "last_duration_ms": None,
+    "last_sessions_deleted": 0,
+    "total_sessions_deleted": 0,
+    "last_subscriptions_expired": 0,
+    "total_subscriptions_expired": 0,
+}
+metrics.register("maintenance", lambda: dict(_stats))
+
+
+def reap_token_sessions(conn, retention_days: int = SESSION_RETENTION_DAYS, batch_size: int = SESSION_REAPER_BATCH_SIZE) -> int:
+    """Remove, em lotes, sessões expiradas ou inativas mais antigas que a retenção"""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    stale = or_(
+        TokenSession.expires_at < cutoff,
+        and_(TokenSession.is_active == False, TokenSession.created_at < cutoff)
+    )
+
+    deleted = 0
+    while True:
+        batch = select(TokenSession.id).where(stale).limit(batch_size).scalar_subquery()
+        with conn.begin():
+            result = conn.execute(delete(TokenSession).where(TokenSession.id.in_(batch)))
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+def expire_subscriptions(conn) -> int:
+    """Desativa assinaturas vencidas e limpa o acesso dos usuários sem assinatura vigente"""
+    now = datetime.now(timezone.utc)
+    with conn.begin():
+        result = conn.execute(
+            update(Subscription)
+            .where(Subscription.is_active == True, Subscription.end_date <= now)
+            .values(is_active=False)
+        )
+        # access_until é o fim da assinatura mais longa: se já passou, nenhuma está vigente
+        conn.execute(
+            update(User)
+            .where(User.access_until <= now)
+            .values(access_until=None, tipo_subscricao=None)
+        )
+    return result.rowcount
+
+
+def run_maintenance_cycle() -> None:
+    """Executa um ciclo de manutenção e registra duração e linhas removidas"""
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        is_postgres = conn.dialect.name == "postgresql"
+        if is_postgres:
+            got_lock = conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": MAINTENANCE_LOCK_ID}).scalar()
+            conn.commit()
+            if not got_lock:
+                _stats["skipped"] += 1
+                return
+        try:
+            sessions_deleted = reap_token_sessions(conn)
+            subscriptions_expired = expire_subscriptions(conn)
+        finally:
+            if is_postgres:
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MAINTENANCE_LOCK_ID})
+                conn.commit()
+
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    _stats["runs"] += 1
+    _stats["last_run_at"] = datetime.utcnow().isoformat()
+    _stats["last_duration_ms"] = duration_ms
+    _stats["last_sessions_deleted"] = sessions_deleted
+    _stats["total_sessions_deleted"] += sessions_deleted
+    _stats["last_subscriptions_expired"] = subscriptions_expired
+    _stats["total_subscriptions_expired"] += subscriptions_expired
+    logging.info(
+        "Maintenance cycle finished in %.1f ms: %d token sessions deleted, %d subscriptions expired",
+        duration_ms,
+        sessions_deleted,
+        subscriptions_expired,
+    )
+
+
+async def maintenance_loop(interval_seconds: int = SESSION_REAPER_INTERVAL_SECONDS) -> None:
+    """Executa run_maintenance_cycle periodicamente, fora do event loop"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(run_maintenance_cycle)
+        except Exception as e:
+            _stats["errors"] += 1
+            logging.error("Maintenance cycle failed: %s", str(e))
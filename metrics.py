@@ -0,0 +1,28 @@
+"""
+Métricas operacionais em memória, por worker.
+
+Cada componente registra uma função que devolve um dicionário com os seus
+números atuais; GET /metrics agrega todos num único JSON.
+"""
+import logging
+from typing import Callable, Dict
+
+_providers: Dict[str, Callable[[], dict]] = {}
+
+
+def register(name: str, provider: Callable[[], dict]) -> None:
+    """Registra (ou substitui) um provedor de métricas"""
+    _providers[name] = provider
+
+
+def snapshot() -> dict:
+    """Coleta o estado atual de todos os provedores registrados"""
+    result = {}
+    for name, provider in _providers.items():
+        try:
+            result[name] = provider()
+        except Exception as e:
+            logging.warning("Failed to collect metrics from %s: %s", name, str(e))
+            # Só o tipo: a mensagem pode ter hosts e detalhes de conexão (fica no log)
+            result[name] = {"error": type(e).__name__}
+    return result
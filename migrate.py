@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Aplica as migrações de esquema do Jornal Destaque API
+
+Deve rodar uma vez por deploy, antes de subir os workers web (que não
+executam DDL por padrão):
+
+    python migrate.py            # cria tabelas ausentes e aplica as migrações pendentes
+    python migrate.py --status   # lista migrações aplicadas e pendentes
+"""
+import argparse
+import logging
+import sys
+
+from database import engine
+from models import Base
+from migrations import MIGRATIONS, pending_migrations, run_migrations
+
+
+def main():
+    """Função principal do comando de migração"""
+    parser = argparse.ArgumentParser(description="Migrações de esquema do banco de dados")
+    parser.add_argument("--status", action="store_true", help="apenas lista o estado das migrações")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    if args.status:
+        pending = set(pending_migrations(engine))
+        for version, description, *_ in MIGRATIONS:
+            state = "pendente" if version in pending else "aplicada"
+            print(f"{version}  [{state}]  {description}")
+        return
+
+    try:
+        applied = run_migrations(engine, Base.metadata)
+    except Exception as e:
+        logging.critical("Falha ao aplicar migrações: %s", str(e))
+        sys.exit(1)
+
+    if applied:
+        print(f"✅ Migrações aplicadas: {', '.join(applied)}")
+    else:
+        print("✅ Banco de dados já está atualizado")
+
+
+if __name__ == "__main__":
+    main()
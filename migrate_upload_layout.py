@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Move os arquivos enviados para o layout em dois níveis (<pasta>/<aa>/<bb>/<arquivo>)
+
+    python migrate_upload_layout.py                   # move e reescreve os caminhos
+    python migrate_upload_layout.py --dry-run         # só mostra o que seria feito
+    python migrate_upload_layout.py --batch-size 200
+
+Feito para rodar com a API parada, mas também funciona com ela no ar: em cada
+lote os arquivos são movidos antes de os caminhos serem reescritos no banco, e
+a API encontra o arquivo nos dois layouts (file_handler.resolve_file_path).
+Cada caminho é trocado de uma vez em stored_files e em todos os jornais que o
+citam, sob o mesmo lock que a API usa para liberar arquivos. Pode ser
+interrompido e rodado de novo.
+"""
+import argparse
+import logging
+import os
+from typing import Dict
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from config import UPLOAD_DIR
+from database import SessionLocal
+from file_handler import fanout_path, lock_stored_path
+from models import Jornal, StoredFile
+from response_cache import bump_catalog_version
+
+
+def move_file(old_path: str, new_path: str, dry_run: bool) -> str:
+    """Move um arquivo para o novo caminho; retorna 'moved', 'already' ou 'missing'"""
+    source = os.path.join(UPLOAD_DIR, old_path)
+    target = os.path.join(UPLOAD_DIR, new_path)
+    if not os.path.isfile(source):
+        return "already" if os.path.isfile(target) else "missing"
+    if not dry_run:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.exists(target):
+            # Mesmo nome, mesmo arquivo (SHA-256 do conteúdo ou UUID): fica a cópia já movida
+            os.remove(source)
+        else:
+            os.replace(source, target)
+    return "moved"
+
+
+def rename_path(db: Session, old_path: str, new_path: str) -> None:
+    """
+    Troca old_path por new_path em todos os jornais que o citam e leva a
+    contagem de referências junto (somando se new_path já existir)
+
+    Tudo na transação de `db`: nenhum jornal fica com o caminho antigo enquanto
+    a contagem já está no novo, o que faria um release_file concorrente tratar o
+    arquivo compartilhado como de uma referência só.
+    """
+    lock_stored_path(db, old_path)
+    for column in (Jornal.capa, Jornal.arquivopdf):
+        db.execute(update(Jornal).where(column == old_path).values({column.key: new_path}))
+
+    old = db.execute(select(StoredFile.ref_count).where(StoredFile.path == old_path)).scalar()
+    if old is None:
+        return
+    if db.get(StoredFile, new_path) is not None:
+        db.execute(
+            update(StoredFile)
+            .where(StoredFile.path == new_path)
+            .values(ref_count=StoredFile.ref_count + old)
+        )
+        db.execute(delete(StoredFile).where(StoredFile.path == old_path))
+    else:
+        db.execute(update(StoredFile).where(StoredFile.path == old_path).values(path=new_path))
+
+
+def migrate_jornais(batch_size: int, dry_run: bool, stats: Dict[str, int]) -> None:
+    last_id = 0
+    while True:
+        db = SessionLocal()
+        try:
+            jornais = db.execute(
+                select(Jornal).where(Jornal.id > last_id).order_by(Jornal.id).limit(batch_size)
+            ).scalars().all()
+            if not jornais:
+                return
+            last_id = jornais[-1].id
+
+            changed = 0
+            for jornal in jornais:
+                for field in ("capa", "arquivopdf"):
+                    old_path = getattr(jornal, field)
+                    if not old_path:
+                        continue
+                    new_path = fanout_path(old_path)
+                    if new_path == old_path:
+                        continue
+                    stats[move_file(old_path, new_path, dry_run)] += 1
+                    rename_path(db, old_path, new_path)
+                    changed += 1
+
+            if dry_run or not changed:
+                db.rollback()
+            else:
+                # As URLs das listagens em cache mudam com os caminhos
+                bump_catalog_version(db)
+                db.commit()
+            stats["paths"] += changed
+            logging.info("jornais até o id %d: %d caminhos reescritos", last_id, changed)
+        finally:
+            db.close()
+
+
+def migrate_unreferenced_stored_files(dry_run: bool, stats: Dict[str, int]) -> None:
+    """stored_files no layout antigo que nenhum jornal cita mais (ex.: só capas trocadas)"""
+    db = SessionLocal()
+    try:
+        paths = db.execute(select(StoredFile.path)).scalars().all()
+        for old_path in paths:
+            new_path = fanout_path(old_path)
+            if new_path == old_path:
+                continue
+            stats[move_file(old_path, new_path, dry_run)] += 1
+            rename_path(db, old_path, new_path)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    finally:
+        db.close()
+
+
+def count_leftovers() -> int:
+    """Arquivos que ficaram direto nas pastas (não citados no banco)"""
+    leftovers = 0
+    for subfolder in ("covers", "pdfs"):
+        folder = os.path.join(UPLOAD_DIR, subfolder)
+        if os.path.isdir(folder):
+            leftovers += sum(1 for entry in os.scandir(folder) if entry.is_file())
+    return leftovers
+
+
+def main():
+    """Função principal da migração de layout"""
+    parser = argparse.ArgumentParser(description="Migração dos uploads para o layout em dois níveis")
+    parser.add_argument("--batch-size", type=int, default=500, help="jornais por transação")
+    parser.add_argument("--dry-run", action="store_true", help="não move arquivos nem altera o banco")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    stats = {"paths": 0, "moved": 0, "already": 0, "missing": 0}
+    migrate_jornais(args.batch_size, args.dry_run, stats)
+    migrate_unreferenced_stored_files(args.dry_run, stats)
+
+    if args.dry_run:
+        print(f"[dry-run] {stats['paths']} caminhos a reescrever; movimentações de arquivo: {stats['moved']}, "
+              f"já no layout novo: {stats['already']}, ausentes: {stats['missing']}")
+        return
+    print(f"✅ {stats['paths']} caminhos reescritos; arquivos movidos: {stats['moved']}, "
+          f"já no layout novo: {stats['already']}, ausentes: {stats['missing']}")
+    leftovers = count_leftovers()
+    if leftovers:
+        print(f"⚠️  {leftovers} arquivos continuam no layout antigo sem referência no banco")
+
+
+if __name__ == "__main__":
+    main()
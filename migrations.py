@@ -0,0 +1,354 @@
+"""
+Migrações de esquema versionadas.
+
+`Base.metadata.create_all` só cria tabelas novas; alterações em tabelas já
+existentes ficam registradas aqui, em ordem, e são aplicadas uma única vez
+(controle na tabela `schema_migrations`). Cada migração deve ser idempotente
+para funcionar tanto em bancos novos quanto em bancos antigos.
+
+As migrações rodam offline (`python migrate.py`) antes do deploy; os workers
+web apenas conferem se não há versões pendentes.
+"""
+import hashlib
+import logging
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.engine import Connection, Engine
+
+# Chave arbitrária para o advisory lock do PostgreSQL (evita corrida entre workers no boot)
+MIGRATION_LOCK_ID = 7_351_902
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", String(50), primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+MIGRATIONS: List[Tuple[str, str, Callable[[Connection], None], bool]] = []
+
+
+def migration(version: str, description: str, transactional: bool = True):
+    """Registra uma função de migração na ordem de declaração
+
+    Com transactional=False a função recebe uma conexão em autocommit (necessário
+    para CREATE INDEX CONCURRENTLY no PostgreSQL).
+    """
+    def decorator(fn: Callable[[Connection], None]):
+        MIGRATIONS.append((version, description, fn, transactional))
+        return fn
+    return decorator
+
+
+def _record(conn: Connection, version: str, description: str) -> None:
+    conn.execute(schema_migrations.insert().values(
+        version=version,
+        description=description,
+        applied_at=datetime.utcnow(),
+    ))
+
+
+def _columns(conn: Connection, table: str) -> set:
+    return {col["name"] for col in inspect(conn).get_columns(table)}
+
+
+def _has_table(conn: Connection, table: str) -> bool:
+    return inspect(conn).has_table(table)
+
+
+@migration("0001", "token_sessions: troca o token bruto por token_hash indexado")
+def _token_session_hash(conn: Connection) -> None:
+    if not _has_table(conn, "token_sessions"):
+        return
+    columns = _columns(conn, "token_sessions")
+    if "token" not in columns:
+        return
+
+    if "token_hash" not in columns:
+        conn.execute(text("ALTER TABLE token_sessions ADD COLUMN token_hash VARCHAR(64)"))
+
+    # Tokens repetidos (emitidos no mesmo segundo antes da claim jti) mantêm o digest real
+    # apenas na sessão mais recente; as demais recebem sha256("id:token") e são desativadas.
+    if conn.dialect.name == "postgresql":
+        # Um único UPDATE em conjunto, sem ida e volta por linha
+        conn.execute(text(TOKEN_HASH_BACKFILL_SQL))
+    else:
+        _backfill_token_hash(conn)
+
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_token_sessions_token_hash ON token_sessions (token_hash)"
+    ))
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE token_sessions ALTER COLUMN token_hash SET NOT NULL"))
+    conn.execute(text("ALTER TABLE token_sessions DROP COLUMN token"))
+
+
+TOKEN_HASH_BACKFILL_SQL = """
+UPDATE token_sessions AS t
+SET token_hash = CASE WHEN d.rn = 1
+        THEN encode(sha256(convert_to(COALESCE(t.token, ''), 'UTF8')), 'hex')
+        ELSE encode(sha256(convert_to(t.id::text || ':' || COALESCE(t.token, ''), 'UTF8')), 'hex')
+    END,
+    is_active = CASE WHEN d.rn = 1 THEN t.is_active ELSE false END
+FROM (
+    SELECT id, row_number() OVER (PARTITION BY COALESCE(token, '') ORDER BY id DESC) AS rn
+    FROM token_sessions
+) AS d
+WHERE d.id = t.id
+"""
+
+
+def _backfill_token_hash(conn: Connection) -> None:
+    # Outros bancos: em lotes, do mais novo para o mais antigo
+    seen = set()
+    last_id = None
+    while True:
+        query = "SELECT id, token FROM token_sessions"
+        params = {}
+        if last_id is not None:
+            query += " WHERE id < :last_id"
+            params["last_id"] = last_id
+        rows = conn.execute(text(query + " ORDER BY id DESC LIMIT 1000"), params).fetchall()
+        if not rows:
+            break
+        for row_id, token in rows:
+            digest = hashlib.sha256((token or "").encode("utf-8")).hexdigest()
+            if digest in seen:
+                digest = hashlib.sha256(f"{row_id}:{token}".encode("utf-8")).hexdigest()
+                conn.execute(
+                    text("UPDATE token_sessions SET token_hash = :h, is_active = :f WHERE id = :id"),
+                    {"h": digest, "f": False, "id": row_id},
+                )
+            else:
+                seen.add(digest)
+                conn.execute(
+                    text("UPDATE token_sessions SET token_hash = :h WHERE id = :id"),
+                    {"h": digest, "id": row_id},
+                )
+        last_id = rows[-1][0]
+
+
+@migration("0002", "users: session_seq e session_epoch para o modo stateless")
+def _user_session_epoch(conn: Connection) -> None:
+    if not _has_table(conn, "users"):
+        return
+    columns = _columns(conn, "users")
+    for name in ("session_seq", "session_epoch"):
+        if name not in columns:
+            conn.execute(text(f"ALTER TABLE users ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0"))
+
+
+# Índices compostos dos filtros mais frequentes (os mesmos declarados em models.py)
+HOT_PATH_INDEXES = [
+    ("ix_subscriptions_user_active_end", "subscriptions", "user_id, is_active, end_date"),
+    ("ix_jornais_active_publicacao", "jornais", "is_active, data_publicacao"),
+    ("ix_subscription_requests_status_created", "subscription_requests", "status, created_at"),
+    ("ix_token_sessions_user_active_expires", "token_sessions", "user_id, is_active, expires_at"),
+]
+
+
+@migration("0003", "índices compostos para os filtros mais frequentes", transactional=False)
+def _hot_path_indexes(conn: Connection) -> None:
+    # CONCURRENTLY evita bloquear escritas durante a criação em tabelas grandes
+    concurrently = "CONCURRENTLY " if conn.dialect.name == "postgresql" else ""
+    for name, table, columns in HOT_PATH_INDEXES:
+        if _has_table(conn, table):
+            conn.execute(text(f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+# (nome, tabela, coluna) -> users.id; os mesmos nomes declarados em models.py
+USER_FOREIGN_KEYS = [
+    ("fk_subscriptions_user_id", "subscriptions", "user_id"),
+    ("fk_subscription_requests_user_id", "subscription_requests", "user_id"),
+    ("fk_subscription_requests_approved_by", "subscription_requests", "approved_by"),
+    ("fk_token_sessions_user_id", "token_sessions", "user_id"),
+]
+
+
+@migration("0004", "chaves estrangeiras para users.id", transactional=False)
+def _user_foreign_keys(conn: Connection) -> None:
+    if conn.dialect.name != "postgresql":
+        # SQLite não permite adicionar FK em tabela existente; bancos novos já as recebem do create_all
+        return
+    for name, table, column in USER_FOREIGN_KEYS:
+        if not _has_table(conn, table):
+            continue
+        existing = {fk["name"] for fk in inspect(conn).get_foreign_keys(table)}
+        if name in existing:
+            continue
+        # NOT VALID aplica a restrição às novas linhas sem varrer a tabela sob lock
+        conn.execute(text(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} "
+            f"FOREIGN KEY ({column}) REFERENCES users (id) NOT VALID"
+        ))
+        try:
+            conn.execute(text(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}"))
+        except SQLAlchemyError as e:
+            logging.warning(
+                "Constraint %s left NOT VALID (orphan rows in %s.%s?): %s", name, table, column, str(e)
+            )
+
+
+# Ordem (created_at, id) das listagens administrativas paginadas por cursor
+KEYSET_INDEXES = [
+    ("ix_users_created_id", "users", "created_at, id"),
+    ("ix_subscriptions_created_id", "subscriptions", "created_at, id"),
+    ("ix_subscription_requests_created_id", "subscription_requests", "created_at, id"),
+]
+
+
+@migration("0005", "índices para paginação por cursor", transactional=False)
+def _keyset_indexes(conn: Connection) -> None:
+    concurrently = "CONCURRENTLY " if conn.dialect.name == "postgresql" else ""
+    for name, table, columns in KEYSET_INDEXES:
+        if _has_table(conn, table):
+            conn.execute(text(f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+# Wrapper IMMUTABLE de unaccent(): a função original é STABLE e não pode ser usada em índices
+UNACCENT_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION jd_unaccent(text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+"""
+
+
+@migration("0006", "índice de busca textual por título", transactional=False)
+def _titulo_search_index(conn: Connection) -> None:
+    if conn.dialect.name != "postgresql":
+        # Outros bancos usam a busca em memória de search.py
+        return
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+    conn.execute(text(UNACCENT_FUNCTION_SQL))
+    if _has_table(conn, "jornais"):
+        # Mesma expressão de search.TITULO_TSVECTOR, para que o planner use o índice
+        conn.execute(text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jornais_titulo_fts ON jornais "
+            "USING GIN (to_tsvector('portuguese'::regconfig, jd_unaccent(titulo)))"
+        ))
+
+
+@migration("0007", "texto dos PDFs: jornais.pdf_indexed_at e índice de busca por página", transactional=False)
+def _pdf_text_search(conn: Connection) -> None:
+    # A tabela jornal_pages é criada pelo create_all; aqui só o que ele não faz
+    if _has_table(conn, "jornais") and "pdf_indexed_at" not in _columns(conn, "jornais"):
+        column_type = "TIMESTAMP WITH TIME ZONE" if conn.dialect.name == "postgresql" else "DATETIME"
+        conn.execute(text(f"ALTER TABLE jornais ADD COLUMN pdf_indexed_at {column_type}"))
+    if conn.dialect.name == "postgresql" and _has_table(conn, "jornal_pages"):
+        # Mesma expressão de search.CONTENT_TSVECTOR
+        conn.execute(text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jornal_pages_content_fts ON jornal_pages "
+            "USING GIN (to_tsvector('portuguese'::regconfig, jd_unaccent(content)))"
+        ))
+
+
+@migration("0008", "users.access_until: fim da assinatura vigente", transactional=False)
+def _user_access_until(conn: Connection) -> None:
+    if not _has_table(conn, "users"):
+        return
+    is_postgres = conn.dialect.name == "postgresql"
+    if "access_until" not in _columns(conn, "users"):
+        column_type = "TIMESTAMP WITH TIME ZONE" if is_postgres else "DATETIME"
+        conn.execute(text(f"ALTER TABLE users ADD COLUMN access_until {column_type}"))
+    if _has_table(conn, "subscriptions"):
+        conn.execute(text(
+            "UPDATE users SET access_until = ("
+            "SELECT MAX(s.end_date) FROM subscriptions s "
+            "WHERE s.user_id = users.id AND s.is_active = :active) "
+            "WHERE access_until IS NULL"
+        ), {"active": True})
+    concurrently = "CONCURRENTLY " if is_postgres else ""
+    conn.execute(text(f"CREATE INDEX {concurrently}IF NOT EXISTS ix_users_access_until ON users (access_until)"))
+
+
+@migration("0009", "catalog_versions: versão inicial do catálogo de jornais")
+def _catalog_version(conn: Connection) -> None:
+    # A tabela é criada pelo create_all; a linha precisa existir para o UPDATE ... RETURNING
+    if _has_table(conn, "catalog_versions"):
+        conn.execute(text(
+            "INSERT INTO catalog_versions (name, version) SELECT 'jornais', 0 "
+            "WHERE NOT EXISTS (SELECT 1 FROM catalog_versions WHERE name = 'jornais')"
+        ))
+
+
+@migration("0010", "busca por título com a configuração 'simple' (prefixos sem stemming)", transactional=False)
+def _titulo_simple_search_index(conn: Connection) -> None:
+    if conn.dialect.name != "postgresql" or not _has_table(conn, "jornais"):
+        return
+    # Mesma expressão de search.TITULO_TSVECTOR; o índice 'portuguese' da 0006 deixa de ser usado
+    conn.execute(text(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jornais_titulo_simple_fts ON jornais "
+        "USING GIN (to_tsvector('simple'::regconfig, jd_unaccent(titulo)))"
+    ))
+    conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS ix_jornais_titulo_fts"))
+
+
+@migration("0011", "jornal_pages.content_tsv: tsvector armazenado para a busca no texto dos PDFs", transactional=False)
+def _page_content_tsv(conn: Connection) -> None:
+    if conn.dialect.name != "postgresql" or not _has_table(conn, "jornal_pages"):
+        return
+    if "content_tsv" not in _columns(conn, "jornal_pages"):
+        # Coluna gerada: o texto de cada página é analisado uma vez, na escrita, e não a cada
+        # busca. Reescreve a tabela, então deve rodar com migrate.py antes do deploy
+        conn.execute(text(
+            "ALTER TABLE jornal_pages ADD COLUMN content_tsv tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, jd_unaccent(content))) STORED"
+        ))
+    conn.execute(text(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jornal_pages_content_tsv ON jornal_pages USING GIN (content_tsv)"
+    ))
+    conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS ix_jornal_pages_content_fts"))
+
+
+def _applied_versions(engine: Engine) -> set:
+    with engine.connect() as conn:
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_migrations(engine: Engine) -> List[str]:
+    """Versões ainda não aplicadas (consulta leve, usada no boot dos workers)"""
+    try:
+        applied = _applied_versions(engine)
+    except SQLAlchemyError:
+        # Tabela schema_migrations inexistente: banco nunca migrado
+        return [version for version, *_ in MIGRATIONS]
+    return [version for version, *_ in MIGRATIONS if version not in applied]
+
+
+def run_migrations(engine: Engine, metadata: MetaData = None) -> List[str]:
+    """Cria as tabelas ausentes de `metadata`, aplica as migrações pendentes e retorna as versões aplicadas"""
+    applied_now = []
+    with engine.connect() as lock_conn:
+        is_postgres = lock_conn.dialect.name == "postgresql"
+        if is_postgres:
+            lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        try:
+            if metadata is not None:
+                metadata.create_all(bind=engine)
+            _metadata.create_all(bind=engine)
+            applied = _applied_versions(engine)
+
+            for version, description, fn, transactional in MIGRATIONS:
+                if version in applied:
+                    continue
+                logging.info("Applying migration %s: %s", version, description)
+                if transactional:
+                    with engine.begin() as conn:
+                        fn(conn)
+                        _record(conn, version, description)
+                else:
+                    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                        fn(conn)
+                    with engine.begin() as conn:
+                        _record(conn, version, description)
+                applied_now.append(version)
+        finally:
+            if is_postgres:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+                lock_conn.commit()
+    return applied_now
@@ -1,81 +1,148 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Enum
-from sqlalchemy.sql import func
-from database import Base
-import enum
-
-class SubscriptionType(enum.Enum):
-    DIARIO = "diario"
-    SEMANAL = "semanal"
-    MENSAL = "mensal"
-    ANUAL = "anual"
-
-class UserType(enum.Enum):
-    ADMIN = "admin"
-    USER = "user"
-
-class User(Base):
-    __tablename__ = "users"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    nome = Column(String(100), nullable=False)
-    telefone = Column(String(20), nullable=False)
-    email = Column(String(100), unique=True, index=True, nullable=False)
-    senha = Column(String(255), nullable=False)
-    tipo_subscricao = Column(Enum(SubscriptionType), nullable=True)
-    tipo_usuario = Column(Enum(UserType), default=UserType.USER)
-    is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-
-class Jornal(Base):
-    __tablename__ = "jornais"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    titulo = Column(String(200), nullable=False)
-    capa = Column(String(500), nullable=True)  # URL da imagem da capa
-    arquivopdf = Column(String(500), nullable=False)  # URL do arquivo PDF
-    data_publicacao = Column(DateTime(timezone=True), server_default=func.now())
-    is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-
-class Subscription(Base):
-    __tablename__ = "subscriptions"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, nullable=False)
-    subscription_type = Column(Enum(SubscriptionType), nullable=False)
-    start_date = Column(DateTime(timezone=True), server_default=func.now())
-    end_date = Column(DateTime(timezone=True), nullable=False)
-    is_active = Column(Boolean, default=True)
-    payment_method = Column(String(50), default="digital")  # digital ou fisico
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-
-class SubscriptionRequestStatus(enum.Enum):
-    PENDING = "pending"
-    APPROVED = "approved"
-    REJECTED = "rejected"
-
-class SubscriptionRequest(Base):
-    __tablename__ = "subscription_requests"
-
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, nullable=False)
-    subscription_type = Column(Enum(SubscriptionType), nullable=False)
-    status = Column(Enum(SubscriptionRequestStatus), default=SubscriptionRequestStatus.PENDING, nullable=False)
-    payment_reference = Column(String(255), nullable=True)
-    observacao_admin = Column(Text, nullable=True)
-    approved_by = Column(Integer, nullable=True)
-    approved_at = Column(DateTime(timezone=True), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-
-class TokenSession(Base):
-    __tablename__ = "token_sessions"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, nullable=False)
-    token = Column(Text, nullable=False)
-    device_info = Column(String(500), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    expires_at = Column(DateTime(timezone=True), nullable=False)
-    is_active = Column(Boolean, default=True)
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, Text, Enum, Index, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from database import Base
+import enum
+
+class SubscriptionType(enum.Enum):
+    DIARIO = "diario"
+    SEMANAL = "semanal"
+    MENSAL = "mensal"
+    ANUAL = "anual"
+
+class UserType(enum.Enum):
+    ADMIN = "admin"
+    USER = "user"
+
+class User(Base):
+    __tablename__ = "users"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    nome = Column(String(100), nullable=False)
+    telefone = Column(String(20), nullable=False)
+    email = Column(String(100), unique=True, index=True, nullable=False)
+    senha = Column(String(255), nullable=False)
+    tipo_subscricao = Column(Enum(SubscriptionType), nullable=True)
+    tipo_usuario = Column(Enum(UserType), default=UserType.USER)
+    is_active = Column(Boolean, default=True)
+    access_until = Column(DateTime(timezone=True), nullable=True, index=True)  # fim da assinatura vigente
+    session_seq = Column(Integer, nullable=False, default=0, server_default="0")  # logins emitidos
+    session_epoch = Column(Integer, nullable=False, default=0, server_default="0")  # menor seq válido
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_users_created_id", "created_at", "id"),
+    )
+
+class Jornal(Base):
+    __tablename__ = "jornais"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    titulo = Column(String(200), nullable=False)
+    capa = Column(String(500), nullable=True)  # URL da imagem da capa
+    arquivopdf = Column(String(500), nullable=False)  # URL do arquivo PDF
+    data_publicacao = Column(DateTime(timezone=True), server_default=func.now())
+    is_active = Column(Boolean, default=True)
+    pdf_indexed_at = Column(DateTime(timezone=True), nullable=True)  # texto do PDF extraído para a busca
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_jornais_active_publicacao", "is_active", "data_publicacao"),
+    )
+
+class JornalPage(Base):
+    """Texto extraído de cada página do PDF de um jornal (índice da busca textual)"""
+    __tablename__ = "jornal_pages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    jornal_id = Column(Integer, ForeignKey("jornais.id", name="fk_jornal_pages_jornal_id", ondelete="CASCADE"), nullable=False)
+    page_number = Column(Integer, nullable=False)  # a partir de 1
+    content = Column(Text, nullable=False)
+
+    jornal = relationship("Jornal")
+
+    __table_args__ = (
+        Index("ix_jornal_pages_jornal_page", "jornal_id", "page_number", unique=True),
+    )
+
+class StoredFile(Base):
+    """Arquivo enviado, nomeado pelo SHA-256 do conteúdo; removido do disco quando ref_count chega a 0"""
+    __tablename__ = "stored_files"
+
+    path = Column(String(500), primary_key=True)  # caminho relativo, como em Jornal.capa/arquivopdf
+    sha256 = Column(String(64), nullable=False, index=True)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=1, server_default="1")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class CatalogVersion(Base):
+    """Versão do catálogo de jornais, incrementada a cada alteração (chave do cache de respostas)"""
+    __tablename__ = "catalog_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class Subscription(Base):
+    __tablename__ = "subscriptions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", name="fk_subscriptions_user_id"), nullable=False)
+    subscription_type = Column(Enum(SubscriptionType), nullable=False)
+    start_date = Column(DateTime(timezone=True), server_default=func.now())
+    end_date = Column(DateTime(timezone=True), nullable=False)
+    is_active = Column(Boolean, default=True)
+    payment_method = Column(String(50), default="digital")  # digital ou fisico
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    user = relationship("User", foreign_keys=[user_id])
+
+    __table_args__ = (
+        Index("ix_subscriptions_user_active_end", "user_id", "is_active", "end_date"),
+        Index("ix_subscriptions_created_id", "created_at", "id"),
+    )
+
+class SubscriptionRequestStatus(enum.Enum):
+    PENDING = "pending"
+    APPROVED = "approved"
+    REJECTED = "rejected"
+
+class SubscriptionRequest(Base):
+    __tablename__ = "subscription_requests"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", name="fk_subscription_requests_user_id"), nullable=False)
+    subscription_type = Column(Enum(SubscriptionType), nullable=False)
+    status = Column(Enum(SubscriptionRequestStatus), default=SubscriptionRequestStatus.PENDING, nullable=False)
+    payment_reference = Column(String(255), nullable=True)
+    observacao_admin = Column(Text, nullable=True)
+    approved_by = Column(Integer, ForeignKey("users.id", name="fk_subscription_requests_approved_by"), nullable=True)
+    approved_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    user = relationship("User", foreign_keys=[user_id])
+    approver = relationship("User", foreign_keys=[approved_by])
+
+    __table_args__ = (
+        Index("ix_subscription_requests_status_created", "status", "created_at"),
+        Index("ix_subscription_requests_created_id", "created_at", "id"),
+    )
+
+class TokenSession(Base):
+    __tablename__ = "token_sessions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", name="fk_token_sessions_user_id"), nullable=False)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)  # SHA-256 do JWT
+    device_info = Column(String(500), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    is_active = Column(Boolean, default=True)
+
+    user = relationship("User", foreign_keys=[user_id])
+
+    __table_args__ = (
+        Index("ix_token_sessions_user_active_expires", "user_id", "is_active", "expires_at"),
+    )
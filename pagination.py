@@ -0,0 +1,55 @@
+"""
+Paginação por cursor (keyset) das listagens.
+
+As listagens são ordenadas por (data, id) decrescente. O cursor é opaco para
+o cliente: codifica a chave do último item da página, e a página seguinte
+começa estritamente depois dela. O custo não cresce com a profundidade e
+edições publicadas durante a navegação não deslocam os resultados.
+
+O corpo das respostas continua sendo a lista de itens; o cursor da próxima
+página vai no cabeçalho X-Next-Cursor (ausente na última página). Sem
+`cursor`, o parâmetro `skip` (offset) continua funcionando.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    payload = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decodifica o cursor; levanta 400 se ele foi adulterado ou truncado"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+
+
+def paginate(query, sort_column, id_column, skip: int, limit: int, cursor: Optional[str]):
+    """Ordena por (sort_column, id) decrescente e aplica o cursor ou, sem ele, o offset"""
+    query = query.order_by(sort_column.desc(), id_column.desc())
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        return query.where(tuple_(sort_column, id_column) < tuple_(sort_value, row_id)).limit(limit)
+    return query.offset(skip).limit(limit)
+
+
+def set_next_cursor(response: Response, items: Sequence, limit: int, sort_attr: str) -> None:
+    """Publica o cursor da próxima página quando a página atual veio cheia"""
+    if limit <= 0 or len(items) < limit:
+        return
+    last = items[-1]
+    sort_value = getattr(last, sort_attr)
+    if sort_value is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sort_value, last.id)
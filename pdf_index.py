@@ -0,0 +1,106 @@
+"""
+Indexação do texto dos PDFs das edições para a busca textual.
+
+O texto de cada página é extraído com pypdf e gravado em `jornal_pages`
+(uma linha por página). A extração roda em segundo plano depois que
+create_jornal/update_jornal respondem, e também pelo comando de backfill
+`python index_pdfs.py` para o acervo existente.
+"""
+import logging
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import List
+
+from pypdf import PdfReader
+from pypdf.errors import PyPdfError
+from sqlalchemy import delete, update
+
+import metrics
+from file_handler import resolve_file_path
+from database import SessionLocal
+from models import Jornal, JornalPage
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_stats = {
+    "indexed": 0,
+    "failed": 0,
+    "pages": 0,
+    "last_duration_ms": None,
+}
+metrics.register("pdf_index", lambda: dict(_stats))
+
+
+def extract_pages(pdf_path: str) -> List[str]:
+    """Texto de cada página do PDF, com espaços normalizados"""
+    reader = PdfReader(pdf_path)
+    pages = []
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        # O PostgreSQL não aceita NUL em colunas de texto
+        pages.append(_WHITESPACE_RE.sub(" ", text.replace("\x00", "")).strip())
+    return pages
+
+
+def index_jornal_pdf(jornal_id: int, arquivopdf: str) -> bool:
+    """
+    Extrai e grava o texto do PDF `arquivopdf` do jornal
+
+    Se o PDF do jornal foi trocado enquanto a extração rodava, o resultado é
+    descartado (a tarefa disparada pela troca indexa o arquivo novo).
+
+    Returns:
+        bool: True se o índice do jornal foi atualizado
+    """
+    started = time.perf_counter()
+    try:
+        full_path = resolve_file_path(arquivopdf)
+        if full_path is None:
+            raise FileNotFoundError(arquivopdf)
+        pages = extract_pages(full_path)
+    except (OSError, PyPdfError) as e:
+        _stats["failed"] += 1
+        logging.warning("Could not extract text from %s (jornal %s): %s", arquivopdf, jornal_id, str(e))
+        return False
+
+    db = SessionLocal()
+    try:
+        jornal = db.query(Jornal).filter(Jornal.id == jornal_id).with_for_update().first()
+        if not jornal or jornal.arquivopdf != arquivopdf:
+            db.rollback()
+            return False
+        db.execute(delete(JornalPage).where(JornalPage.jornal_id == jornal_id))
+        db.add_all([
+            JornalPage(jornal_id=jornal_id, page_number=number, content=content)
+            for number, content in enumerate(pages, start=1)
+            if content
+        ])
+        # Core update: pelo ORM o onupdate de updated_at mudaria o jornal sem
+        # incrementar a versão do catálogo, e as listagens em cache ficariam defasadas
+        db.execute(
+            update(Jornal)
+            .where(Jornal.id == jornal_id)
+            .values(pdf_indexed_at=datetime.now(timezone.utc), updated_at=Jornal.updated_at)
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        _stats["failed"] += 1
+        raise
+    finally:
+        db.close()
+
+    _stats["indexed"] += 1
+    _stats["pages"] += len(pages)
+    _stats["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return True
+
+
+def index_jornal_pdf_task(jornal_id: int, arquivopdf: str) -> None:
+    """Versão para BackgroundTasks: erros são registrados, nunca propagados"""
+    try:
+        index_jornal_pdf(jornal_id, arquivopdf)
+    except Exception as e:
+        logging.error("Failed to index PDF of jornal %s: %s", jornal_id, str(e))
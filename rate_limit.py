@@ -0,0 +1,139 @@
+"""
+Limitador de tentativas de login (token bucket em memória, por worker).
+
+Cada chave tem um balde com `burst` fichas que se recompõe a
+`rate_per_minute`. Toda tentativa gasta uma ficha do IP do cliente; só as
+tentativas com senha errada gastam do balde (email, IP), então quem conhece o
+email de um usuário não consegue bloquear o login dele a partir de outro IP.
+A verificação acontece antes de qualquer hash de senha, então um ataque de
+credential stuffing recebe 429 sem custar CPU.
+Baldes cheios não precisam ser guardados: são descartados numa varredura
+periódica e o número de chaves é limitado, mantendo a memória estável. Os
+baldes ficam em ordem de último acesso (LRU), então a varredura só percorre
+os vencidos e o excesso de chaves descarta as menos usadas, em O(1).
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+import metrics
+from config import (
+    LOGIN_RATE_LIMIT_IP_PER_MINUTE,
+    LOGIN_RATE_LIMIT_IP_BURST,
+    LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE,
+    LOGIN_RATE_LIMIT_EMAIL_BURST,
+    RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_TRUSTED_PROXIES,
+)
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        # chave -> (fichas, último acesso), do acesso mais antigo para o mais recente
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._ops = 0
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0 and self.burst > 0
+
+    def hit(self, key: str) -> Optional[float]:
+        """Consome uma ficha; retorna None se permitido ou os segundos até a próxima ficha"""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            limited = tokens < 1
+            self._buckets[key] = (tokens, now) if limited else (tokens - 1, now)
+            self._buckets.move_to_end(key)
+            # Sob ataque com chaves demais, descarta as de acesso mais antigo
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+            self._ops += 1
+            if self._ops % 1000 == 0:
+                self._sweep(now)
+            if limited:
+                self.limited += 1
+                return (1 - tokens) / self.rate
+        return None
+
+    def retry_after(self, key: str) -> Optional[float]:
+        """Como hit, mas sem consumir ficha: None se há ficha ou os segundos até a próxima"""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return None
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            if tokens >= 1:
+                return None
+            self.limited += 1
+            return (1 - tokens) / self.rate
+
+    def _sweep(self, now: float) -> None:
+        # Remove baldes que já se recompuseram por completo (equivalem a uma chave nova);
+        # em ordem de último acesso, eles estão todos no início
+        refill_seconds = self.burst / self.rate
+        while self._buckets:
+            key, (_, last) = next(iter(self._buckets.items()))
+            if now - last < refill_seconds:
+                break
+            del self._buckets[key]
+
+    def stats(self) -> dict:
+        return {"keys": len(self._buckets), "limited": self.limited}
+
+
+login_ip_limiter = TokenBucketLimiter(LOGIN_RATE_LIMIT_IP_PER_MINUTE, LOGIN_RATE_LIMIT_IP_BURST, RATE_LIMIT_MAX_KEYS)
+# Falhas de login por (email, IP)
+login_email_limiter = TokenBucketLimiter(LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE, LOGIN_RATE_LIMIT_EMAIL_BURST, RATE_LIMIT_MAX_KEYS)
+metrics.register("login_rate_limit", lambda: {
+    "ip": login_ip_limiter.stats(),
+    "email": login_email_limiter.stats(),
+})
+
+
+def client_ip(request: Request) -> str:
+    """IP do cliente, considerando RATE_LIMIT_TRUSTED_PROXIES saltos de X-Forwarded-For"""
+    if RATE_LIMIT_TRUSTED_PROXIES > 0:
+        forwarded = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if forwarded:
+            # O proxy confiável mais externo acrescenta o IP que viu ao final da lista
+            return forwarded[-min(RATE_LIMIT_TRUSTED_PROXIES, len(forwarded))]
+    return request.client.host if request.client else "unknown"
+
+
+def _failure_key(request: Request, email: str) -> str:
+    return f"{email.strip().lower()}|{client_ip(request)}"
+
+
+def enforce_login_rate_limit(request: Request, email: str) -> None:
+    """Levanta 429 (com Retry-After) se o IP excedeu o limite de tentativas ou o
+    par (email, IP) o de senhas erradas"""
+    retry_after = login_ip_limiter.hit(client_ip(request))
+    if retry_after is None:
+        retry_after = login_email_limiter.retry_after(_failure_key(request, email))
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Muitas tentativas de login. Tente novamente mais tarde.",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+
+
+def record_login_failure(request: Request, email: str) -> None:
+    """Conta uma senha errada para o par (email, IP)"""
+    login_email_limiter.hit(_failure_key(request, email))
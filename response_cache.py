@@ -0,0 +1,157 @@
+"""
+Cache das listagens de jornais com ETag forte e respostas 304.
+
+A chave de cada resposta combina a versão do catálogo (`catalog_versions`),
+os parâmetros da requisição e, nas rotas do leitor, a data de hoje e a faixa
+de acesso do usuário (assinante ou não). O ETag é o hash dessa chave, então
+é o mesmo em todos os workers: quem envia `If-None-Match` com o ETag atual
+recebe 304 sem nenhuma consulta além da leitura periódica da versão.
+
+A versão é incrementada na mesma transação que cria, altera ou remove um
+jornal. Cada worker guarda a versão lida de cada banco (réplica ou primário)
+por até CATALOG_VERSION_TTL_SECONDS, e a requisição usa a versão do mesmo banco
+de onde vai ler os dados: uma réplica atrasada só gera entradas sob a versão
+que ela própria tem, nunca sob a versão mais nova lida do primário.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import metrics
+from database import async_read_engine
+from config import RESPONSE_CACHE_MAX_ENTRIES, CATALOG_VERSION_TTL_SECONDS
+from models import CatalogVersion
+from pagination import NEXT_CURSOR_HEADER
+
+CATALOG = "jornais"
+
+# Cabeçalhos da resposta original que também são guardados no cache
+_STORED_HEADERS = (NEXT_CURSOR_HEADER.lower(),)
+
+
+def bump_catalog_version(db: Session) -> None:
+    """Incrementa a versão do catálogo na transação corrente; não faz commit"""
+    db.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.name == CATALOG)
+        .values(version=CatalogVersion.version + 1)
+    )
+
+
+def _engine_of(db: AsyncSession):
+    # Engine em uso pela sessão (ReplicaReadSession troca a réplica pelo primário se ela falhar)
+    return db.sync_session.bind
+
+
+class CatalogVersionCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        # Por engine (réplica ou primário): (versão, instante da leitura)
+        self._versions: Dict[object, Tuple[int, float]] = {}
+
+    async def get(self, db: AsyncSession) -> int:
+        """Versão atual no banco de `db`, relida quando a leitura anterior passou do TTL"""
+        cached = self._versions.get(_engine_of(db))
+        if cached is not None and time.monotonic() - cached[1] < self.ttl_seconds:
+            return cached[0]
+        result = await db.execute(select(CatalogVersion.version).where(CatalogVersion.name == CATALOG))
+        version = result.scalar() or 0
+        # Depois do execute: se a réplica falhou, a sessão passou para o primário
+        self._versions[_engine_of(db)] = (version, time.monotonic())
+        return version
+
+    def invalidate(self) -> None:
+        """Força a releitura na próxima requisição (após um commit neste worker)"""
+        self._versions.clear()
+
+    def versions(self) -> Dict[str, int]:
+        # "replica"/"primary" em vez da URL do banco
+        return {
+            "replica" if async_read_engine is not None and bind is async_read_engine.sync_engine else "primary": version
+            for bind, (version, _) in list(self._versions.items())
+        }
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    headers: Dict[str, str]
+
+
+class ResponseCache:
+    """Cache LRU de corpos JSON indexado pelo ETag"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def lookup(self, request: Request, etag: str, cache_control: str) -> Optional[Response]:
+        """304 se o cliente já tem esta versão, a resposta guardada se houver; senão None"""
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(etag)
+            self.hits += 1
+        return self.respond(entry, etag, cache_control)
+
+    def store(self, etag: str, response: Response) -> CachedResponse:
+        """Guarda o corpo e os cabeçalhos relevantes de `response` sob o ETag"""
+        entry = CachedResponse(
+            response.body,
+            {name: value for name, value in response.headers.items() if name in _STORED_HEADERS},
+        )
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[etag] = entry
+                self._entries.move_to_end(etag)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def respond(entry: CachedResponse, etag: str, cache_control: str) -> Response:
+        """Nova resposta (uma por requisição) a partir de uma entrada do cache"""
+        headers = {**entry.headers, "ETag": etag, "Cache-Control": cache_control}
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+
+def make_etag(version: int, key: tuple) -> str:
+    """ETag forte derivado da versão do catálogo e da chave da requisição"""
+    digest = hashlib.sha256(repr((version,) + key).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match usa comparação fraca: W/"x" equivale a "x"
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+
+catalog_version = CatalogVersionCache(CATALOG_VERSION_TTL_SECONDS)
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES)
+metrics.register("response_cache", lambda: {**response_cache.stats(), "catalog_versions": catalog_version.versions()})
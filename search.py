@@ -0,0 +1,207 @@
+"""
+Busca textual por título das edições públicas e no texto dos PDFs.
+
+No PostgreSQL a busca por título usa um tsvector 'simple' (sem stemming) sobre
+o título sem acentos (função imutável `jd_unaccent`), servido pelo índice GIN
+ix_jornais_titulo_simple_fts (migração 0010). Cada termo digitado vira um
+prefixo (`termo:*`), então a busca funciona já durante a digitação; sem
+stemming, o prefixo casa com as palavras como escritas, igual à busca em
+memória. Os resultados vêm ordenados por relevância (ts_rank) e depois pela
+data de publicação.
+
+O texto dos PDFs (tabela jornal_pages, preenchida por pdf_index.py) é buscado
+na coluna gerada jornal_pages.content_tsv (mesma configuração, migração 0011),
+com o índice GIN ix_jornal_pages_content_tsv: o casamento e o ts_rank usam o
+tsvector armazenado, sem analisar de novo o texto das páginas a cada busca.
+
+Em outros bancos (SQLite nos testes locais) a mesma semântica é reproduzida em
+memória: normalização sem acentos, casamento por prefixo e pontuação simples.
+"""
+import re
+import unicodedata
+from typing import List, Sequence, Tuple
+
+from sqlalchemy import desc, func, literal_column, select
+# Registra to_tsvector/to_tsquery com os tipos do PostgreSQL antes de montar as expressões abaixo
+import sqlalchemy.dialects.postgresql  # noqa: F401
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Jornal, JornalPage
+
+# Deve ser idêntica à expressão do índice ix_jornais_titulo_simple_fts e à da
+# coluna gerada jornal_pages.content_tsv (migrations.py)
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+TITULO_TSVECTOR = func.to_tsvector(SEARCH_CONFIG, func.jd_unaccent(Jornal.titulo))
+# Só existe no PostgreSQL, por isso não é declarada em models.JornalPage
+CONTENT_TSVECTOR = literal_column("jornal_pages.content_tsv")
+
+MAX_PAGES_PER_EDITION = 3
+SNIPPET_CHARS = 200
+
+_TERM_RE = re.compile(r"[^\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Minúsculas e sem acentos ("Notícias" -> "noticias")"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def search_terms(busca: str) -> List[str]:
+    """Termos da busca; pontuação e operadores do tsquery são descartados"""
+    return _TERM_RE.findall(normalize(busca or ""))
+
+
+async def search_jornais(db: AsyncSession, query, terms: List[str], skip: int, limit: int) -> List:
+    """Aplica a busca a `query` (select de colunas de Jornal já filtrado) e retorna a página de linhas por relevância"""
+    if db.bind.dialect.name == "postgresql":
+        tsquery = _tsquery(terms)
+        rank = func.ts_rank(TITULO_TSVECTOR, tsquery)
+        query = (
+            query.where(TITULO_TSVECTOR.op("@@")(tsquery))
+            .order_by(rank.desc(), Jornal.data_publicacao.desc(), Jornal.id.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        result = await db.execute(query)
+        return list(result.all())
+
+    result = await db.execute(query)
+    scored = []
+    for row in result.all():
+        score = _score(normalize(row.titulo), terms)
+        if score:
+            scored.append((score, row))
+    scored.sort(key=lambda item: (item[0], item[1].data_publicacao, item[1].id), reverse=True)
+    return [row for _, row in scored[skip:skip + limit]]
+
+
+async def search_pages(db: AsyncSession, terms: List[str], skip: int, limit: int) -> List[Tuple[Jornal, List[Tuple[int, str]]]]:
+    """
+    Edições ativas cujo PDF contém todos os termos, por relevância
+
+    Returns:
+        Lista de (jornal, [(página, trecho), ...]) com até MAX_PAGES_PER_EDITION
+        páginas por edição, das mais relevantes para as menos
+    """
+    if db.bind.dialect.name != "postgresql":
+        return await _search_pages_in_memory(db, terms, skip, limit)
+
+    tsquery = _tsquery(terms)
+    matches = CONTENT_TSVECTOR.op("@@")(tsquery)
+    rank = func.ts_rank(CONTENT_TSVECTOR, tsquery)
+
+    # 1) página de edições, ordenadas pela página mais relevante de cada uma
+    best = (
+        select(JornalPage.jornal_id, func.max(rank).label("rank"))
+        .join(Jornal, Jornal.id == JornalPage.jornal_id)
+        .where(Jornal.is_active == True, matches)
+        .group_by(JornalPage.jornal_id)
+        .order_by(desc("rank"), JornalPage.jornal_id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    ids = [row.jornal_id for row in (await db.execute(best)).all()]
+    if not ids:
+        return []
+
+    # 2) as melhores páginas de cada edição (o texto só é lido para elas)
+    position = func.row_number().over(
+        partition_by=JornalPage.jornal_id, order_by=(rank.desc(), JornalPage.page_number)
+    ).label("position")
+    ranked_pages = (
+        select(JornalPage.jornal_id, JornalPage.page_number, JornalPage.content, position)
+        .where(JornalPage.jornal_id.in_(ids), matches)
+        .subquery()
+    )
+    rows = await db.execute(
+        select(ranked_pages.c.jornal_id, ranked_pages.c.page_number, ranked_pages.c.content)
+        .where(ranked_pages.c.position <= MAX_PAGES_PER_EDITION)
+        .order_by(ranked_pages.c.jornal_id, ranked_pages.c.position)
+    )
+    pages = {jornal_id: [] for jornal_id in ids}
+    for jornal_id, page_number, content in rows:
+        pages[jornal_id].append((page_number, snippet(content, terms)))
+
+    jornais = {j.id: j for j in (await db.execute(select(Jornal).where(Jornal.id.in_(ids)))).scalars()}
+    return [(jornais[jornal_id], pages[jornal_id]) for jornal_id in ids if jornal_id in jornais]
+
+
+async def _search_pages_in_memory(db: AsyncSession, terms: List[str], skip: int, limit: int):
+    result = await db.execute(
+        select(Jornal, JornalPage.page_number, JornalPage.content)
+        .join(JornalPage, JornalPage.jornal_id == Jornal.id)
+        .where(Jornal.is_active == True)
+    )
+    hits = {}
+    for jornal, page_number, content in result.all():
+        score = _score(normalize(content), terms)
+        if score:
+            hits.setdefault(jornal.id, (jornal, []))[1].append((score, page_number, content))
+
+    editions = sorted(
+        hits.values(),
+        key=lambda hit: (max(score for score, *_ in hit[1]), hit[0].id),
+        reverse=True,
+    )
+    results = []
+    for jornal, matched in editions[skip:skip + limit]:
+        matched.sort(key=lambda page: (-page[0], page[1]))
+        results.append((jornal, [
+            (page_number, snippet(content, terms)) for _, page_number, content in matched[:MAX_PAGES_PER_EDITION]
+        ]))
+    return results
+
+
+def snippet(content: str, terms: List[str], width: int = SNIPPET_CHARS) -> str:
+    """Trecho de `content` em torno da primeira ocorrência de um dos termos"""
+    normalized, offsets = _normalized_with_offsets(content)
+    pattern = re.compile(r"\b(?:" + "|".join(re.escape(term) for term in terms) + ")")
+    match = pattern.search(normalized)
+    center = offsets[match.start()] if match else 0
+
+    start = max(0, center - width // 3)
+    end = min(len(content), start + width)
+    start = max(0, end - width)
+    # Não corta palavras nas bordas
+    if start > 0:
+        space = content.find(" ", start, center)
+        start = space + 1 if space != -1 else start
+    if end < len(content):
+        space = content.rfind(" ", center, end)
+        end = space if space != -1 else end
+    text = content[start:end].strip()
+    return ("…" if start > 0 else "") + text + ("…" if end < len(content) else "")
+
+
+def _normalized_with_offsets(text: str) -> Tuple[str, Sequence[int]]:
+    """Texto normalizado e, para cada caractere dele, a posição correspondente no original"""
+    normalized = normalize(text)
+    if len(normalized) == len(text):
+        # Caso comum: acentos compostos viram uma única letra base
+        return normalized, range(len(text))
+    chars, offsets = [], []
+    for position, ch in enumerate(text):
+        for n in normalize(ch):
+            chars.append(n)
+            offsets.append(position)
+    return "".join(chars), offsets
+
+
+def _tsquery(terms: List[str]):
+    # Sem acentos pela mesma função do índice
+    return func.to_tsquery(SEARCH_CONFIG, func.jd_unaccent(" & ".join(f"{term}:*" for term in terms)))
+
+
+def _score(titulo: str, terms: List[str]) -> int:
+    """0 se algum termo não casa; palavras inteiras valem mais que prefixos"""
+    words = _TERM_RE.findall(titulo)
+    score = 0
+    for term in terms:
+        if term in words:
+            score += 2
+        elif any(word.startswith(term) for word in words):
+            score += 1
+        else:
+            return 0
+    return score
@@ -0,0 +1,66 @@
+"""
+Serialização rápida das listagens de edições.
+
+As listagens selecionam só as colunas expostas (sem hidratar objetos ORM),
+montam as URLs concatenando um prefixo pré-calculado e geram o JSON direto
+com orjson. A resposta sai pronta, sem passar de novo pela validação do
+`response_model`, que continua declarado nas rotas para a documentação.
+O JSON produzido é o mesmo de JornalResponse (campos, ordem e datas).
+"""
+from typing import Dict, Iterable, List, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+
+from config import PUBLIC_PDF_FILES
+from file_handler import FILES_URL_PREFIX, PUBLIC_BASE_URL
+from models import Jornal
+
+# Colunas de JornalResponse; a ordem é a usada em jornal_rows_to_dicts
+JORNAL_COLUMNS = (
+    Jornal.id,
+    Jornal.titulo,
+    Jornal.capa,
+    Jornal.arquivopdf,
+    Jornal.data_publicacao,
+    Jornal.is_active,
+    Jornal.created_at,
+    Jornal.updated_at,
+)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        # OPT_UTC_Z: datas em UTC saem com "Z", como no encoder do pydantic
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def _file_url(path: Optional[str]) -> Optional[str]:
+    return FILES_URL_PREFIX + path.replace("\\", "/") if path else None
+
+
+def _pdf_url(jornal_id: int, path: Optional[str]) -> Optional[str]:
+    # Mesmo resultado de file_handler.get_pdf_url
+    if not path:
+        return None
+    if PUBLIC_PDF_FILES:
+        return _file_url(path)
+    return f"{PUBLIC_BASE_URL}/user/jornais/{jornal_id}/pdf"
+
+
+def jornal_rows_to_dicts(rows: Iterable, has_access: Optional[Dict[int, bool]] = None) -> List[dict]:
+    """Converte linhas de select(*JORNAL_COLUMNS) no formato de JornalResponse"""
+    items = []
+    for jornal_id, titulo, capa, arquivopdf, data_publicacao, is_active, created_at, updated_at in rows:
+        items.append({
+            "titulo": titulo,
+            "capa": _file_url(capa),
+            "arquivopdf": _pdf_url(jornal_id, arquivopdf) or "",
+            "id": jornal_id,
+            "data_publicacao": data_publicacao,
+            "is_active": is_active,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "has_access": has_access[jornal_id] if has_access is not None else None,
+        })
+    return items
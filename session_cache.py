@@ -0,0 +1,118 @@
+"""
+Cache em memória das sessões resolvidas por get_current_user.
+
+Cada entrada é indexada pelo digest SHA-256 do bearer token e guarda o id da
+sessão e um snapshot destacado (detached) do usuário, evitando as duas consultas
+ao banco em chamadas repetidas. O cache é por processo: logout, remoção de
+dispositivos e alterações de usuário invalidam as entradas explicitamente no
+worker que fez a alteração; nos demais a entrada expira pelo TTL.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, NamedTuple, Optional, Set
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from config import SESSION_CACHE_TTL_SECONDS, SESSION_CACHE_MAX_ENTRIES
+
+
+def token_digest(token: str) -> str:
+    """Gera o digest (hex) usado como chave de um bearer token"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def detached_copy(instance):
+    """Cria uma cópia destacada de uma instância ORM com todas as colunas carregadas"""
+    mapper = inspect(instance).mapper
+    copy = mapper.class_(**{attr.key: getattr(instance, attr.key) for attr in mapper.column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+class CachedSession(NamedTuple):
+    session_id: int
+    user_id: int
+    user: object
+    deadline: float
+
+
+class SessionCache:
+    """Cache LRU com TTL, seguro para uso a partir do threadpool do FastAPI"""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CachedSession]" = OrderedDict()
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, digest: str) -> Optional[CachedSession]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            if entry.deadline <= time.monotonic():
+                self._discard(digest)
+                return None
+            self._entries.move_to_end(digest)
+            return entry
+
+    def set(self, digest: str, session_id: int, user, session_expires_at: datetime) -> None:
+        if not self.enabled:
+            return
+        # Nunca guarda a entrada além da validade da própria sessão
+        if session_expires_at.tzinfo is None:
+            session_expires_at = session_expires_at.replace(tzinfo=timezone.utc)
+        remaining = session_expires_at.timestamp() - time.time()
+        ttl = min(self.ttl_seconds, remaining)
+        if ttl <= 0:
+            return
+
+        entry = CachedSession(session_id, user.id, detached_copy(user), time.monotonic() + ttl)
+        with self._lock:
+            self._discard(digest)
+            self._entries[digest] = entry
+            self._by_user.setdefault(entry.user_id, set()).add(digest)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def invalidate_token(self, digest: str) -> None:
+        with self._lock:
+            self._discard(digest)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for digest in list(self._by_user.get(user_id, ())):
+                self._discard(digest)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _discard(self, digest: str) -> None:
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return
+        digests = self._by_user.get(entry.user_id)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_user[entry.user_id]
+
+
+session_cache = SessionCache(SESSION_CACHE_MAX_ENTRIES, SESSION_CACHE_TTL_SECONDS)
@@ -0,0 +1,101 @@
+"""
+Mapa em memória dos "epochs" de sessão por usuário (modo AUTH_STATELESS_MODE).
+
+Cada token carrega a claim `seq` (número sequencial do login do usuário). O
+token é válido enquanto `seq >= users.session_epoch`; logout e a remoção de
+dispositivos excedentes apenas elevam o epoch. O mapa guarda só os usuários
+com epoch > 0 e é atualizado incrementalmente a partir do banco, então a
+revogação feita em outro worker vale em até SESSION_EPOCH_REFRESH_SECONDS.
+"""
+import asyncio
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+from config import SESSION_EPOCH_REFRESH_SECONDS
+from database import SessionLocal
+from models import User
+
+# Releitura de linhas recentes, para não perder transações que commitaram atrasadas
+REFRESH_OVERLAP_SECONDS = 60
+FULL_RELOAD_EVERY = 60
+
+
+class SessionEpochs:
+    def __init__(self, refresh_seconds: int):
+        self.refresh_seconds = refresh_seconds
+        self._epochs: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._newest = None  # maior updated_at já lido
+        self._refreshes = 0
+        self._last_refresh = None  # time.monotonic() do último refresh bem-sucedido
+
+    def is_fresh(self) -> bool:
+        """Indica se o mapa foi atualizado recentemente o bastante para ser usado"""
+        if self._last_refresh is None:
+            return False
+        return time.monotonic() - self._last_refresh <= 3 * self.refresh_seconds
+
+    def get(self, user_id: int) -> int:
+        return self._epochs.get(user_id, 0)
+
+    def bump(self, user_id: int, epoch: Optional[int]) -> None:
+        """Aplica localmente um epoch recém-gravado no banco"""
+        if not epoch:
+            return
+        with self._lock:
+            if epoch > self._epochs.get(user_id, 0):
+                self._epochs[user_id] = epoch
+
+    def refresh(self) -> int:
+        """Carrega do banco os epochs alterados desde o último refresh"""
+        full = self._newest is None or self._refreshes % FULL_RELOAD_EVERY == 0
+        query = select(User.id, User.session_epoch, User.updated_at).where(User.session_epoch > 0)
+        if not full:
+            query = query.where(User.updated_at >= self._newest - timedelta(seconds=REFRESH_OVERLAP_SECONDS))
+
+        db = SessionLocal()
+        try:
+            rows = db.execute(query).all()
+        finally:
+            db.close()
+
+        with self._lock:
+            if full:
+                self._epochs = {}
+            for user_id, epoch, updated_at in rows:
+                if epoch > self._epochs.get(user_id, 0):
+                    self._epochs[user_id] = epoch
+                if updated_at is not None and (self._newest is None or updated_at > self._newest):
+                    self._newest = updated_at
+            self._refreshes += 1
+            self._last_refresh = time.monotonic()
+        return len(rows)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._epochs),
+            "refreshes": self._refreshes,
+            "fresh": self.is_fresh(),
+            "age_seconds": round(time.monotonic() - self._last_refresh, 1) if self._last_refresh else None,
+        }
+
+
+session_epochs = SessionEpochs(SESSION_EPOCH_REFRESH_SECONDS)
+metrics.register("session_epochs", session_epochs.stats)
+
+
+async def session_epoch_refresh_loop() -> None:
+    """Atualiza o mapa de epochs periodicamente, fora do event loop"""
+    while True:
+        await asyncio.sleep(session_epochs.refresh_seconds)
+        try:
+            await run_in_threadpool(session_epochs.refresh)
+        except Exception as e:
+            logging.error("Failed to refresh session epochs: %s", str(e))
@@ -0,0 +1,52 @@
+"""
+URLs de arquivo assinadas com HMAC e prazo de validade.
+
+A assinatura cobre usuário, jornal, caminho do arquivo e instante de
+expiração, com uma chave derivada de SECRET_KEY. A rota que serve a URL
+confere só a assinatura e o prazo (trabalho de CPU, sem token nem consulta
+ao banco): o acesso do usuário é verificado quando a URL é emitida e vale
+até ela expirar, no máximo SIGNED_URL_TTL_SECONDS depois.
+"""
+import base64
+import hashlib
+import hmac
+import time
+from typing import Optional
+from urllib.parse import quote, urlencode
+
+from config import SECRET_KEY, SIGNED_URL_TTL_SECONDS
+
+# Rota que serve as URLs assinadas (user_routes.download_signed_file)
+SIGNED_FILES_PATH = "/user/arquivos"
+
+# Chave própria para as URLs, separada da usada nos JWTs
+_KEY = hashlib.sha256(b"jd-signed-file-url:" + SECRET_KEY.encode("utf-8")).digest()
+
+
+def _signature(user_id: int, jornal_id: int, file_path: str, expires: int) -> str:
+    message = f"{user_id}:{jornal_id}:{expires}:{file_path}".encode("utf-8")
+    digest = hmac.new(_KEY, message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def sign_file_url(base_url: str, user_id: int, jornal_id: int, file_path: str,
+                  ttl_seconds: Optional[int] = None) -> str:
+    """URL assinada para `file_path`, válida por `ttl_seconds` (padrão SIGNED_URL_TTL_SECONDS)"""
+    file_path = file_path.replace("\\", "/")
+    expires = int(time.time()) + (SIGNED_URL_TTL_SECONDS if ttl_seconds is None else ttl_seconds)
+    query = urlencode({
+        "u": user_id,
+        "j": jornal_id,
+        "exp": expires,
+        "sig": _signature(user_id, jornal_id, file_path, expires),
+    })
+    return f"{base_url}{SIGNED_FILES_PATH}/{quote(file_path)}?{query}"
+
+
+def verify_file_signature(user_id: int, jornal_id: int, file_path: str, expires: int,
+                          signature: str, now: Optional[float] = None) -> bool:
+    """Confere a assinatura e o prazo de uma URL emitida por sign_file_url"""
+    if expires < (time.time() if now is None else now):
+        return False
+    expected = _signature(user_id, jornal_id, file_path, expires)
+    return hmac.compare_digest(expected.encode("ascii"), signature.encode("utf-8"))
@@ -0,0 +1,69 @@
+"""
+Coalescência de requisições idênticas simultâneas (single-flight), por worker.
+
+A primeira requisição com uma chave executa a consulta; as que chegam com a
+mesma chave enquanto ela está em andamento aguardam e recebem o mesmo
+resultado (ou a mesma exceção). Se a requisição líder for cancelada (cliente
+desconectou), as que aguardavam executam a consulta por conta própria.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+import metrics
+
+T = TypeVar("T")
+
+
+class _LeaderCancelled(Exception):
+    pass
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.leader_cancellations = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Executa `fn` uma única vez para chamadas simultâneas com a mesma chave"""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                return await fn()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            self.leader_cancellations += 1
+            future.set_exception(_LeaderCancelled())
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+            # Consome a exceção da future para não gerar aviso quando ninguém a aguardou
+            if future.done():
+                future.exception()
+
+    def stats(self) -> dict:
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "leader_cancellations": self.leader_cancellations,
+            "inflight": len(self._inflight),
+        }
+
+
+catalog_flight = SingleFlight()
+metrics.register("catalog_single_flight", catalog_flight.stats)
@@ -0,0 +1,76 @@
+import asyncio
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import database
+from database import ReplicaHealth, ReplicaReadSession
+
+
+def _missing_db_url(tmp_path, driver="sqlite"):
+    # Diretório inexistente: toda conexão falha com OperationalError
+    return f"{driver}:///{tmp_path / 'ausente' / 'replica.db'}"
+
+
+def test_replica_failure_retries_on_primary(tmp_path, monkeypatch):
+    health = ReplicaHealth(max_lag=10, check_interval=5)
+    health.healthy = True
+    monkeypatch.setattr(database, "replica_health", health)
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(_missing_db_url(tmp_path))
+    ReadSession = sessionmaker(bind=replica, class_=ReplicaReadSession, info={"primary_bind": primary})
+
+    with ReadSession() as db:
+        assert db.execute(text("SELECT 1")).scalar() == 1
+        assert db.scalar(text("SELECT 2")) == 2
+        assert db.bind is primary
+    assert health.healthy is False
+    assert health.last_error == "OperationalError"
+
+
+def test_async_replica_failure_retries_on_primary(tmp_path, monkeypatch):
+    health = ReplicaHealth(max_lag=10, check_interval=5)
+    health.healthy = True
+    monkeypatch.setattr(database, "replica_health", health)
+
+    async def scenario():
+        primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+        replica = create_async_engine(_missing_db_url(tmp_path, "sqlite+aiosqlite"))
+        ReadSession = async_sessionmaker(
+            replica, class_=AsyncSession, sync_session_class=ReplicaReadSession,
+            info={"primary_bind": primary.sync_engine},
+        )
+        async with ReadSession() as db:
+            assert (await db.execute(text("SELECT 1"))).scalar() == 1
+            assert db.sync_session.bind is primary.sync_engine
+        await primary.dispose()
+        await replica.dispose()
+
+    asyncio.run(scenario())
+    assert health.healthy is False
+
+
+def test_only_one_caller_claims_a_due_check():
+    health = ReplicaHealth(max_lag=10, check_interval=5)
+    assert health.needs_check() is True
+    assert health.needs_check() is False
+    health.mark_failed(RuntimeError("x"))
+    # Uma falha durante a verificação não libera uma segunda verificação simultânea
+    assert health.needs_check() is False
+    health._record(0)
+    assert health.needs_check() is False
+    assert health.healthy is True
+
+
+def test_sync_and_async_pools_share_the_worker_budget(monkeypatch):
+    monkeypatch.setattr(database, "DB_POOL_SIZE", 5)
+    monkeypatch.setattr(database, "DB_MAX_OVERFLOW", 10)
+    monkeypatch.setattr(database, "DB_ASYNC_POOL_SIZE", 2)
+    monkeypatch.setattr(database, "DB_ASYNC_MAX_OVERFLOW", 5)
+
+    sync_size, sync_overflow = database.split_pool_budget(is_async=False)
+    async_size, async_overflow = database.split_pool_budget(is_async=True)
+
+    assert sync_size + async_size == 5
+    assert sync_overflow + async_overflow == 10
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta, timezone
+
+from entitlements import access_flags, can_access, has_full_access
+from models import Jornal, User, UserType
+
+NOW = datetime(2026, 5, 4, 12, tzinfo=timezone.utc)
+
+
+def _user(tipo=UserType.USER, access_until=None) -> User:
+    return User(id=1, tipo_usuario=tipo, access_until=access_until)
+
+
+def _jornal(jornal_id: int, days_ago: int) -> Jornal:
+    return Jornal(id=jornal_id, data_publicacao=NOW - timedelta(days=days_ago))
+
+
+def test_admin_has_access_to_every_edition():
+    admin = _user(UserType.ADMIN)
+    old = _jornal(1, 30)
+    assert has_full_access(admin, NOW)
+    assert can_access(admin, old, NOW)
+    assert access_flags(admin, [old, _jornal(2, 0)], NOW) == {1: True, 2: True}
+
+
+def test_reader_without_subscription_only_gets_todays_edition():
+    reader = _user()
+    assert not has_full_access(reader, NOW)
+    assert access_flags(reader, [_jornal(1, 30), _jornal(2, 0)], NOW) == {1: False, 2: True}
+
+
+def test_subscription_expiry():
+    assert can_access(_user(access_until=NOW + timedelta(days=1)), _jornal(1, 30), NOW)
+    assert not can_access(_user(access_until=NOW - timedelta(seconds=1)), _jornal(1, 30), NOW)
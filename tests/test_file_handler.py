@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+import file_handler
+import main
+from file_handler import fanout_path, flat_path, is_safe_relative_path, resolve_file_path
+
+
+@pytest.fixture
+def client():
+    # Sem o bloco `with`: os eventos de startup (migrações) não rodam
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize("path", [
+    "",
+    "/etc/passwd",
+    "covers/../secret.txt",
+    "covers/..\\..\\secret.txt",
+    "covers/..\\pdfs\\x.pdf",
+    "covers//a.png",
+    "covers/./a.png",
+    "covers/a.png\0",
+])
+def test_is_safe_relative_path_rejects(path):
+    assert not is_safe_relative_path(path)
+
+
+def test_is_safe_relative_path_accepts_both_layouts():
+    assert is_safe_relative_path("covers/a.png")
+    assert is_safe_relative_path(fanout_path("covers/a.png"))
+
+
+def test_fanout_only_for_folder_and_file():
+    assert fanout_path("covers/a.png").startswith("covers/")
+    assert fanout_path("covers/a.png").count("/") == 3
+    assert fanout_path("covers/..\\..\\secret.txt") != "covers/../../secret.txt"
+    assert fanout_path("a/b/c") == "a/b/c"
+    assert flat_path(fanout_path("covers/a.png")) == "covers/a.png"
+    assert flat_path("covers/x/y") == "covers/x/y"
+
+
+def test_resolve_file_path_finds_both_layouts(upload_dir):
+    (upload_dir / "covers" / "a.png").write_bytes(b"img")
+    assert resolve_file_path("covers/a.png") == str(upload_dir / "covers" / "a.png")
+    assert resolve_file_path(fanout_path("covers/a.png")) == str(upload_dir / "covers" / "a.png")
+
+
+def test_resolve_file_path_stays_in_upload_dir(upload_dir):
+    (upload_dir.parent / "secret.txt").write_text("segredo")
+    (upload_dir / "covers" / "link.png").symlink_to(upload_dir.parent / "secret.txt")
+    assert resolve_file_path("covers/..\\..\\secret.txt") is None
+    assert resolve_file_path("covers/../../secret.txt") is None
+    assert resolve_file_path("covers/link.png") is None
+
+
+def test_serve_file_rejects_encoded_backslash(upload_dir, client):
+    (upload_dir.parent / "secret.txt").write_text("segredo")
+    (upload_dir / "pdfs" / "x.pdf").write_bytes(b"%PDF")
+    (upload_dir / "covers" / "a.png").write_bytes(b"img")
+
+    assert client.get("/files/covers/..%5C..%5Csecret.txt").status_code == 404
+    assert client.get("/files/covers/..%5Cpdfs%5Cx.pdf").status_code == 404
+    assert client.get("/files/covers/%2e%2e/%2e%2e/secret.txt").status_code == 404
+    assert client.get("/files/covers/a.png").status_code == 200
+
+
+def _upload(content: bytes, filename: str = "a.pdf", content_type: str = "application/pdf") -> UploadFile:
+    return UploadFile(io.BytesIO(content), filename=filename, headers=Headers({"content-type": content_type}))
+
+
+def test_concurrent_identical_uploads(upload_dir, monkeypatch):
+    monkeypatch.setattr(file_handler, "UPLOAD_CHUNK_SIZE", 1024)
+    content = os.urandom(256 * 1024)
+
+    async def upload_many():
+        return await asyncio.gather(*(file_handler.save_upload(_upload(content), "pdf") for _ in range(4)))
+
+    saved = asyncio.run(upload_many())
+    assert len({upload.path for upload in saved}) == 1
+    assert saved[0].sha256 == hashlib.sha256(content).hexdigest()
+    assert (upload_dir / saved[0].path).read_bytes() == content
+    assert not list(upload_dir.rglob("*.part"))
+
+
+def test_upload_over_limit_leaves_nothing(upload_dir, monkeypatch):
+    monkeypatch.setattr(file_handler, "MAX_FILE_SIZE", 1000)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(file_handler.save_upload(_upload(b"x" * 2000), "pdf"))
+    assert error.value.status_code == 413
+    assert not [path for path in upload_dir.rglob("*") if path.is_file()]
+
+
+def test_upload_is_read_once(upload_dir):
+    content = os.urandom(64 * 1024)
+    upload = _upload(content)
+    reads = []
+    original_read = upload.read
+
+    async def counting_read(size=-1):
+        chunk = await original_read(size)
+        reads.append(len(chunk))
+        return chunk
+
+    upload.read = counting_read
+    saved = asyncio.run(file_handler.save_upload(upload, "pdf"))
+    assert sum(reads) == len(content)
+    assert saved.size == len(content)
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from file_streaming import ZEROCOPY_EXTENSION, FileRangeResponse, parse_range
+
+
+def _run(response, scope):
+    messages = []
+
+    async def send(message):
+        if message["type"] == ZEROCOPY_EXTENSION:
+            file = message["file"]
+            file.seek(message["offset"])
+            message = {**message, "data": file.read(message["count"])}
+        messages.append(message)
+
+    asyncio.run(response({"type": "http", **scope}, None, send))
+    return messages
+
+
+def test_zerocopy_sends_requested_range_and_closes_file(tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"0123456789")
+    response = FileRangeResponse(str(path), 2, 5, 206, {}, "application/pdf")
+    messages = _run(response, {"extensions": {ZEROCOPY_EXTENSION: {}}})
+    assert messages[0]["status"] == 206
+    assert messages[1]["data"] == b"23456"
+    assert messages[1]["file"].closed
+
+
+def test_chunked_body_without_zerocopy(tmp_path, monkeypatch):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"0123456789")
+    monkeypatch.setattr(FileRangeResponse, "chunk_size", 3)
+    messages = _run(FileRangeResponse(str(path), 1, 8, 206, {}, "application/pdf"), {})
+    assert b"".join(message.get("body", b"") for message in messages[1:]) == b"12345678"
+    assert messages[-1]["more_body"] is False
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 100)),
+    ("bytes=10-", (10, 990)),
+    ("bytes=990-5000", (990, 10)),  # fim além do arquivo é truncado
+    ("bytes=-100", (900, 100)),
+    ("bytes=-5000", (0, 1000)),  # sufixo maior que o arquivo: o arquivo inteiro
+    (" bytes=0-0 ", (0, 1)),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=5-2", "bytes=-", "bytes=0-1,5-6", "items=0-1", "bytes=a-b"])
+def test_parse_range_ignores_invalid_header(header):
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=2000-3000", "bytes=-0"])
+def test_parse_range_outside_file_is_416(header):
+    with pytest.raises(HTTPException) as exc:
+        parse_range(header, 1000)
+    assert exc.value.status_code == 416
+    assert exc.value.headers["Content-Range"] == "bytes */1000"
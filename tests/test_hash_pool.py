@@ -0,0 +1,58 @@
+import asyncio
+import threading
+
+from hash_pool import HashPool
+
+
+def test_cancelled_request_keeps_slot_until_hash_finishes():
+    async def scenario():
+        pool = HashPool(workers=1, max_queue=4, queue_timeout=5)
+        started = threading.Event()
+        release = threading.Event()
+        concurrent = []
+        active = [0]
+        lock = threading.Lock()
+
+        def slow_hash(value):
+            with lock:
+                active[0] += 1
+                concurrent.append(active[0])
+            started.set()
+            release.wait(5)
+            with lock:
+                active[0] -= 1
+            return value
+
+        first = asyncio.create_task(pool.run(slow_hash, "a"))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        first.cancel()
+        second = asyncio.create_task(pool.run(slow_hash, "b"))
+        await asyncio.sleep(0.05)
+        # A thread do primeiro pedido ainda está ocupada: o segundo espera na fila
+        assert pool.stats()["running"] == 1
+        assert pool.stats()["queue_depth"] == 1
+        release.set()
+        assert await second == "b"
+        assert max(concurrent) == 1
+        assert pool.stats()["running"] == 0
+        assert pool.stats()["queue_depth"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_while_queued_releases_queue_slot():
+    async def scenario():
+        pool = HashPool(workers=1, max_queue=4, queue_timeout=5)
+        release = threading.Event()
+        running = asyncio.create_task(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(pool.run(len, "x"))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        assert pool.stats()["queue_depth"] == 0
+        release.set()
+        await running
+        assert pool.stats()["running"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,53 @@
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import rate_limit
+from rate_limit import TokenBucketLimiter, client_ip, enforce_login_rate_limit, record_login_failure
+
+
+def _request(forwarded_for: str = None, peer: str = "10.0.0.1") -> Request:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiters(monkeypatch):
+    monkeypatch.setattr(rate_limit, "login_ip_limiter", TokenBucketLimiter(30, 30, 1000))
+    monkeypatch.setattr(rate_limit, "login_email_limiter", TokenBucketLimiter(5, 3, 1000))
+
+
+def test_client_ip_uses_trusted_proxy_hop(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_TRUSTED_PROXIES", 1)
+    assert client_ip(_request("9.9.9.9, 1.2.3.4")) == "1.2.3.4"
+    assert client_ip(_request()) == "10.0.0.1"
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_TRUSTED_PROXIES", 0)
+    assert client_ip(_request("1.2.3.4")) == "10.0.0.1"
+
+
+def test_successful_logins_do_not_count_against_email():
+    for _ in range(10):
+        enforce_login_rate_limit(_request("1.1.1.1"), "leitor@x.com")
+
+
+def test_failures_block_only_the_same_email_and_ip():
+    attacker = _request("6.6.6.6")
+    for _ in range(3):
+        enforce_login_rate_limit(attacker, "leitor@x.com")
+        record_login_failure(attacker, "Leitor@x.com")
+    with pytest.raises(HTTPException) as error:
+        enforce_login_rate_limit(attacker, "leitor@x.com")
+    assert error.value.status_code == 429
+    assert int(error.value.headers["Retry-After"]) >= 1
+
+    # O dono da conta, de outro IP, continua entrando
+    enforce_login_rate_limit(_request("1.1.1.1"), "leitor@x.com")
+
+
+def test_lru_eviction_keeps_recent_keys():
+    limiter = TokenBucketLimiter(60, 2, max_keys=2)
+    limiter.hit("a")
+    limiter.hit("b")
+    limiter.hit("a")
+    limiter.hit("c")
+    assert list(limiter._buckets) == ["a", "c"]
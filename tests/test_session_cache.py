@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import admin_routes
+import user_routes
+from models import TokenSession, User, UserType
+from schemas import UserUpdate
+from session_cache import SessionCache, token_digest
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = SessionCache(max_entries=100, ttl_seconds=300)
+    monkeypatch.setattr(user_routes, "session_cache", cache)
+    monkeypatch.setattr(admin_routes, "session_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    User.__table__.create(engine)
+    TokenSession.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _add_user(db, user_id: int, tipo=UserType.USER) -> User:
+    user = User(id=user_id, nome=f"u{user_id}", telefone="0", email=f"u{user_id}@x.com",
+                senha="x", tipo_usuario=tipo)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _cache_session(cache, user, token: str) -> str:
+    digest = token_digest(token)
+    cache.set(digest, 1, user, datetime.now(timezone.utc) + timedelta(hours=1))
+    return digest
+
+
+def test_invalidate_user_drops_only_that_users_tokens():
+    cache = SessionCache(max_entries=100, ttl_seconds=300)
+    alice, bob = User(id=1, nome="a"), User(id=2, nome="b")
+    phone, laptop, other = (_cache_session(cache, alice, "t1"), _cache_session(cache, alice, "t2"),
+                            _cache_session(cache, bob, "t3"))
+
+    cache.invalidate_user(1)
+
+    assert cache.get(phone) is None and cache.get(laptop) is None
+    assert cache.get(other).user_id == 2
+
+
+def test_entry_never_outlives_the_session():
+    cache = SessionCache(max_entries=100, ttl_seconds=300)
+    digest = token_digest("t")
+    cache.set(digest, 1, User(id=1), datetime.now(timezone.utc) - timedelta(seconds=1))
+    assert cache.get(digest) is None
+
+
+def test_logout_invalidates_cached_sessions(cache, db, monkeypatch):
+    user = _add_user(db, 1)
+    digest = _cache_session(cache, user, "token")
+    monkeypatch.setattr(user_routes.session_epochs, "bump", lambda *args: None)
+
+    asyncio.run(user_routes.logout_user(current_user=user, db=db))
+
+    assert cache.get(digest) is None
+
+
+def test_admin_update_invalidates_cached_sessions(cache, db):
+    admin = _add_user(db, 1, UserType.ADMIN)
+    user = _add_user(db, 2)
+    digest = _cache_session(cache, user, "token")
+
+    asyncio.run(admin_routes.update_user(2, UserUpdate(is_active=False), db=db, current_admin=admin))
+
+    assert cache.get(digest) is None
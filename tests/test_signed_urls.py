@@ -0,0 +1,40 @@
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from signed_urls import SIGNED_FILES_PATH, sign_file_url, verify_file_signature
+
+
+def _params(url: str):
+    parts = urlsplit(url)
+    query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+    file_path = unquote(parts.path[len(SIGNED_FILES_PATH) + 1:])
+    return int(query["u"]), int(query["j"]), file_path, int(query["exp"]), query["sig"]
+
+
+def test_signed_url_round_trip():
+    url = sign_file_url("", 7, 42, "pdfs/ab/cd/edição 1.pdf", ttl_seconds=60)
+    assert url.startswith(f"{SIGNED_FILES_PATH}/pdfs/ab/cd/edi%C3%A7%C3%A3o%201.pdf?")
+    assert verify_file_signature(*_params(url))
+
+
+def test_tampered_fields_are_rejected():
+    user_id, jornal_id, file_path, expires, sig = _params(sign_file_url("", 7, 42, "pdfs/a.pdf", 60))
+    assert not verify_file_signature(8, jornal_id, file_path, expires, sig)
+    assert not verify_file_signature(user_id, 43, file_path, expires, sig)
+    assert not verify_file_signature(user_id, jornal_id, "pdfs/b.pdf", expires, sig)
+    assert not verify_file_signature(user_id, jornal_id, file_path, expires + 3600, sig)
+    assert not verify_file_signature(user_id, jornal_id, file_path, expires, sig[:-1] + ("A" if sig[-1] != "A" else "B"))
+
+
+def test_non_ascii_signature_is_rejected():
+    user_id, jornal_id, file_path, expires, _ = _params(sign_file_url("", 7, 42, "pdfs/a.pdf", 60))
+    assert not verify_file_signature(user_id, jornal_id, file_path, expires, "ã" * 43)
+
+
+def test_expired_url_is_rejected():
+    params = _params(sign_file_url("", 7, 42, "pdfs/a.pdf", ttl_seconds=60))
+    expires = params[3]
+    assert verify_file_signature(*params, now=expires)
+    assert not verify_file_signature(*params, now=expires + 1)
+    assert not verify_file_signature(*_params(sign_file_url("", 7, 42, "pdfs/a.pdf", ttl_seconds=-1)),
+                                     now=time.time())
@@ -1,369 +1,483 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime, timedelta
-
-from database import get_db
-from models import User, Jornal, Subscription, SubscriptionType, SubscriptionRequest, SubscriptionRequestStatus
-from schemas import (
-    UserCreate, UserLogin, UserResponse, JornalResponse, SubscriptionCreate, Token,
-    SubscriptionRequestCreate, SubscriptionRequestResponse, ChangePasswordRequest
-)
-from auth import (
-    authenticate_user, 
-    get_password_hash, 
-    get_current_user, 
-    create_access_token, 
-    create_token_session,
-    verify_password,
-    timedelta
-)
-from file_handler import get_file_url
-
-router = APIRouter()
-
-@router.post("/register", response_model=UserResponse)
-async def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    """Registra um novo usuário"""
-    
-    # Verifica se email já existe
-    existing_user = db.query(User).filter(User.email == user.email).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email já está em uso"
-        )
-    
-    # Cria o usuário
-    hashed_password = get_password_hash(user.senha)
-    db_user = User(
-        nome=user.nome,
-        telefone=user.telefone,
-        email=user.email,
-        senha=hashed_password,
-        tipo_subscricao=user.tipo_subscricao
-    )
-    
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    return db_user
-
-@router.post("/login", response_model=Token)
-async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    """Login do usuário"""
-    user = authenticate_user(user_credentials.email, user_credentials.senha, db)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Email ou senha incorretos",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Usuário inativo"
-        )
-    
-    # Cria token de acesso
-    access_token_expires = timedelta(minutes=1440)  # 24 horas
-    access_token = create_access_token(
-        data={"sub": str(user.id), "email": user.email}, 
-        expires_delta=access_token_expires
-    )
-    
-    # Cria sessão de token
-    create_token_session(user.id, access_token, db)
-    
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "expires_in": 86400  # 24 horas em segundos
-    }
-
-@router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
-    """Obtém informações do usuário atual"""
-    return current_user
-
-@router.post("/change-password")
-async def change_password(
-    password_data: ChangePasswordRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Altera a senha do usuário atual"""
-    # Verifica se a senha atual está correta
-    if not verify_password(password_data.senha_atual, current_user.senha):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Senha atual incorreta"
-        )
-    
-    # Valida a nova senha
-    if len(password_data.senha_nova) < 6:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="A nova senha deve ter pelo menos 6 caracteres"
-        )
-    
-    # Atualiza a senha
-    current_user.senha = get_password_hash(password_data.senha_nova)
-    db.commit()
-    
-    return {"message": "Senha alterada com sucesso"}
-
-@router.get("/jornais", response_model=List[JornalResponse])
-async def list_jornais(
-    skip: int = 0, 
-    limit: int = 100, 
-    data_inicio: Optional[str] = None,
-    data_fim: Optional[str] = None,
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
-):
-    """Lista jornais disponíveis com filtro por data"""
-    query = db.query(Jornal).filter(Jornal.is_active == True)
-    
-    # Filtro por data
-    if data_inicio:
-        try:
-            data_inicio_dt = datetime.fromisoformat(data_inicio.replace('Z', '+00:00'))
-            query = query.filter(Jornal.data_publicacao >= data_inicio_dt)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Formato de data inválido")
-    
-    if data_fim:
-        try:
-            data_fim_dt = datetime.fromisoformat(data_fim.replace('Z', '+00:00'))
-            query = query.filter(Jornal.data_publicacao <= data_fim_dt)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Formato de data inválido")
-    
-    jornais = query.offset(skip).limit(limit).all()
-    
-    # Converte para response com URLs completas
-    jornal_responses = []
-    for jornal in jornais:
-        jornal_response = JornalResponse(
-            id=jornal.id,
-            titulo=jornal.titulo,
-            capa=get_file_url(jornal.capa) if jornal.capa else None,
-            arquivopdf=get_file_url(jornal.arquivopdf),
-            data_publicacao=jornal.data_publicacao,
-            is_active=jornal.is_active,
-            created_at=jornal.created_at,
-            updated_at=jornal.updated_at
-        )
-        jornal_responses.append(jornal_response)
-    
-    return jornal_responses
-
-@router.get("/public/jornais", response_model=List[JornalResponse])
-async def list_public_jornais(
-    skip: int = 0,
-    limit: int = 100,
-    busca: Optional[str] = None,
-    data_inicio: Optional[str] = None,
-    data_fim: Optional[str] = None,
-    db: Session = Depends(get_db),
-):
-    """Lista jornais públicos (sem login) com busca e filtro de data (AAAA-MM-DD)."""
-    query = db.query(Jornal).filter(Jornal.is_active == True)
-
-    if busca:
-        query = query.filter(Jornal.titulo.ilike(f"%{busca}%"))
-
-    # Filtro por data (espera formato YYYY-MM-DD)
-    if data_inicio:
-        try:
-            dt_inicio = datetime.strptime(data_inicio, "%Y-%m-%d")
-            query = query.filter(Jornal.data_publicacao >= dt_inicio)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="data_inicio inválida. Use AAAA-MM-DD")
-    if data_fim:
-        try:
-            dt_fim = datetime.strptime(data_fim, "%Y-%m-%d")
-            query = query.filter(Jornal.data_publicacao <= dt_fim)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="data_fim inválida. Use AAAA-MM-DD")
-
-    jornais = query.order_by(Jornal.data_publicacao.desc()).offset(skip).limit(limit).all()
-
-    jornal_responses = []
-    for jornal in jornais:
-        jornal_responses.append(JornalResponse(
-            id=jornal.id,
-            titulo=jornal.titulo,
-            capa=get_file_url(jornal.capa) if jornal.capa else None,
-            arquivopdf=get_file_url(jornal.arquivopdf),
-            data_publicacao=jornal.data_publicacao,
-            is_active=jornal.is_active,
-            created_at=jornal.created_at,
-            updated_at=jornal.updated_at
-        ))
-
-    return jornal_responses
-
-@router.get("/jornais/{jornal_id}", response_model=JornalResponse)
-async def get_jornal(jornal_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    """Obtém um jornal específico"""
-    jornal = db.query(Jornal).filter(Jornal.id == jornal_id, Jornal.is_active == True).first()
-    if not jornal:
-        raise HTTPException(status_code=404, detail="Jornal não encontrado")
-    
-    # Verifica se o usuário tem acesso ao jornal
-    has_access = check_jornal_access(current_user, jornal, db)
-    if not has_access:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Você não tem acesso a este jornal"
-        )
-    
-    # Converte para response com URLs completas
-    jornal_response = JornalResponse(
-        id=jornal.id,
-        titulo=jornal.titulo,
-        capa=get_file_url(jornal.capa) if jornal.capa else None,
-        arquivopdf=get_file_url(jornal.arquivopdf),
-        data_publicacao=jornal.data_publicacao,
-        is_active=jornal.is_active,
-        created_at=jornal.created_at,
-        updated_at=jornal.updated_at
-    )
-    
-    return jornal_response
-
-@router.post("/subscriptions", response_model=dict)
-async def create_subscription(subscription: SubscriptionCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    """Cria uma assinatura digital"""
-    
-    # Calcula data de término baseada no tipo de assinatura
-    start_date = datetime.utcnow()
-    
-    if subscription.subscription_type == SubscriptionType.DIARIO:
-        end_date = start_date + timedelta(days=1)
-    elif subscription.subscription_type == SubscriptionType.SEMANAL:
-        end_date = start_date + timedelta(weeks=1)
-    elif subscription.subscription_type == SubscriptionType.MENSAL:
-        end_date = start_date + timedelta(days=30)
-    elif subscription.subscription_type == SubscriptionType.ANUAL:
-        end_date = start_date + timedelta(days=365)
-    
-    # Cria a assinatura
-    db_subscription = Subscription(
-        user_id=current_user.id,
-        subscription_type=subscription.subscription_type,
-        start_date=start_date,
-        end_date=end_date,
-        payment_method="digital"
-    )
-    
-    db.add(db_subscription)
-    
-    # Atualiza o tipo de assinatura do usuário
-    current_user.tipo_subscricao = subscription.subscription_type
-    
-    db.commit()
-    db.refresh(db_subscription)
-    
-    return {
-        "message": "Assinatura criada com sucesso",
-        "subscription": db_subscription
-    }
-
-@router.get("/my-subscriptions", response_model=List[dict])
-async def get_my_subscriptions(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    """Obtém as assinaturas do usuário atual"""
-    subscriptions = db.query(Subscription).filter(
-        Subscription.user_id == current_user.id,
-        Subscription.is_active == True
-    ).all()
-    
-    result = []
-    for sub in subscriptions:
-        result.append({
-            "id": sub.id,
-            "subscription_type": sub.subscription_type,
-            "start_date": sub.start_date,
-            "end_date": sub.end_date,
-            "is_active": sub.is_active and sub.end_date > datetime.utcnow(),
-            "payment_method": sub.payment_method,
-            "created_at": sub.created_at
-        })
-    
-    return result
-
-# -------------------- Subscription Requests (Pedidos) --------------------
-
-@router.post("/subscriptions/requests", response_model=SubscriptionRequestResponse)
-async def create_subscription_request(
-    body: SubscriptionRequestCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Cria um pedido de assinatura para revisão do admin"""
-
-    req = SubscriptionRequest(
-        user_id=current_user.id,
-        subscription_type=body.subscription_type,
-        status=SubscriptionRequestStatus.PENDING,
-        payment_reference=body.payment_reference,
-    )
-
-    db.add(req)
-    db.commit()
-    db.refresh(req)
-    return req
-
-@router.get("/subscriptions/requests/my", response_model=List[SubscriptionRequestResponse])
-async def list_my_subscription_requests(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Lista pedidos do usuário atual"""
-    reqs = db.query(SubscriptionRequest).filter(SubscriptionRequest.user_id == current_user.id).order_by(SubscriptionRequest.created_at.desc()).all()
-    return reqs
-
-def check_jornal_access(user: User, jornal: Jornal, db: Session) -> bool:
-    """Verifica se o usuário tem acesso ao jornal"""
-    
-    # Se o usuário tem uma assinatura ativa
-    if user.tipo_subscricao:
-        active_subscription = db.query(Subscription).filter(
-            Subscription.user_id == user.id,
-            Subscription.is_active == True,
-            Subscription.end_date > datetime.utcnow()
-        ).first()
-        
-        if active_subscription:
-            return True
-    
-    # Se o jornal é do dia atual (acesso gratuito)
-    jornal_date = jornal.data_publicacao.date()
-    today = datetime.utcnow().date()
-    
-    if jornal_date == today:
-        return True
-    
-    return False
-
-@router.post("/logout")
-async def logout_user(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Logout do usuário (invalida sessões ativas)"""
-    from models import TokenSession
-    
-    # Marca todas as sessões do usuário como inativas
-    sessions = db.query(TokenSession).filter(
-        TokenSession.user_id == current_user.id,
-        TokenSession.is_active == True
-    ).all()
-    
-    for session in sessions:
-        session.is_active = False
-    
-    db.commit()
-    
-    return {"message": "Logout realizado com sucesso"}
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+import mimetypes
+import time
+
+from database import get_db, get_async_db, get_async_read_db
+from models import User, UserType, Jornal, Subscription, SubscriptionType, SubscriptionRequest, SubscriptionRequestStatus
+from schemas import (
+    UserCreate, UserLogin, UserResponse, JornalResponse, SubscriptionCreate, Token,
+    SubscriptionRequestCreate, SubscriptionRequestResponse, ChangePasswordRequest,
+    JornalTextSearchResult, PageMatch
+)
+from auth import (
+    authenticate_user, 
+    get_password_hash_async, 
+    get_current_user, 
+    create_access_token, 
+    create_token_session,
+    reserve_session_seq,
+    revoke_user_sessions,
+    verify_password_async,
+    timedelta
+)
+from file_handler import get_file_url, resolve_file_path
+from file_streaming import file_response
+from signed_urls import verify_file_signature
+from session_cache import session_cache
+from session_epochs import session_epochs
+from rate_limit import enforce_login_rate_limit, record_login_failure
+from pagination import paginate, set_next_cursor
+from search import search_jornais, search_pages, search_terms
+from entitlements import access_flags, can_access, extend_access, has_full_access
+from serialization import JORNAL_COLUMNS, FastJSONResponse, jornal_rows_to_dicts
+from response_cache import CachedResponse, catalog_version, make_etag, response_cache
+from single_flight import catalog_flight
+
+router = APIRouter()
+
+# Listagens com ETag: o cliente pode guardar, mas deve revalidar (If-None-Match) a cada uso
+PUBLIC_CACHE_CONTROL = "no-cache"
+MEMBER_CACHE_CONTROL = "private, no-cache"
+
+def _as_utc(value: datetime) -> datetime:
+    """Datas sem fuso vindas da query string são tratadas como UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+@router.post("/register", response_model=UserResponse)
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
+    """Registra um novo usuário"""
+    
+    # Verifica se email já existe
+    existing_user = db.query(User).filter(User.email == user.email).first()
+    if existing_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email já está em uso"
+        )
+    
+    # Cria o usuário
+    hashed_password = await get_password_hash_async(user.senha)
+    db_user = User(
+        nome=user.nome,
+        telefone=user.telefone,
+        email=user.email,
+        senha=hashed_password,
+        tipo_subscricao=user.tipo_subscricao
+    )
+    
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    
+    return db_user
+
+@router.post("/login", response_model=Token)
+async def login_user(user_credentials: UserLogin, request: Request, db: Session = Depends(get_db)):
+    """Login do usuário"""
+    # Limita tentativas antes de qualquer hash de senha
+    enforce_login_rate_limit(request, user_credentials.email)
+    
+    user = await authenticate_user(user_credentials.email, user_credentials.senha, db)
+    if not user:
+        record_login_failure(request, user_credentials.email)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Email ou senha incorretos",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuário inativo"
+        )
+    
+    user_id = user.id
+    
+    # Cria token de acesso
+    session_seq, session_epoch = reserve_session_seq(user_id, db)
+    access_token_expires = timedelta(minutes=1440)  # 24 horas
+    access_token = create_access_token(
+        data={"sub": str(user_id), "email": user.email, "seq": session_seq}, 
+        expires_delta=access_token_expires
+    )
+    
+    # Cria sessão de token
+    create_token_session(user_id, access_token, db)
+    session_epochs.bump(user_id, session_epoch)
+    
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": 86400  # 24 horas em segundos
+    }
+
+@router.get("/me", response_model=UserResponse)
+async def get_current_user_info(current_user: User = Depends(get_current_user)):
+    """Obtém informações do usuário atual"""
+    return current_user
+
+@router.post("/change-password")
+async def change_password(
+    password_data: ChangePasswordRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Altera a senha do usuário atual"""
+    # Verifica se a senha atual está correta
+    if not await verify_password_async(password_data.senha_atual, current_user.senha):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Senha atual incorreta"
+        )
+    
+    # Valida a nova senha
+    if len(password_data.senha_nova) < 6:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A nova senha deve ter pelo menos 6 caracteres"
+        )
+    
+    # Atualiza a senha
+    current_user.senha = await get_password_hash_async(password_data.senha_nova)
+    db.commit()
+    session_cache.invalidate_user(current_user.id)
+    
+    return {"message": "Senha alterada com sucesso"}
+
+@router.get("/jornais", response_model=List[JornalResponse])
+async def list_jornais(
+    request: Request,
+    skip: int = 0, 
+    limit: int = 100, 
+    cursor: Optional[str] = None,
+    data_inicio: Optional[str] = None,
+    data_fim: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db), 
+    current_user: User = Depends(get_current_user)
+):
+    """Lista jornais disponíveis com filtro por data"""
+    # O conteúdo só varia com o catálogo, os parâmetros, o dia (edição gratuita) e se o usuário é assinante
+    now = datetime.now(timezone.utc)
+    access_bucket = "assinante" if has_full_access(current_user, now) else "gratuito"
+    version = await catalog_version.get(db)
+    etag = make_etag(version, ("member", access_bucket, now.date().isoformat(), skip, limit, cursor, data_inicio, data_fim))
+    cached = response_cache.lookup(request, etag, MEMBER_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+    
+    query = select(*JORNAL_COLUMNS).where(Jornal.is_active == True)
+    
+    # Filtro por data
+    if data_inicio:
+        try:
+            data_inicio_dt = _as_utc(datetime.fromisoformat(data_inicio.replace('Z', '+00:00')))
+            query = query.where(Jornal.data_publicacao >= data_inicio_dt)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Formato de data inválido")
+    
+    if data_fim:
+        try:
+            data_fim_dt = _as_utc(datetime.fromisoformat(data_fim.replace('Z', '+00:00')))
+            query = query.where(Jornal.data_publicacao <= data_fim_dt)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Formato de data inválido")
+    
+    query = paginate(query, Jornal.data_publicacao, Jornal.id, skip, limit, cursor)
+    
+    async def load() -> CachedResponse:
+        result = await db.execute(query)
+        rows = result.all()
+        
+        # Acesso de cada edição a partir do usuário já carregado (sem consultas extras)
+        has_access = access_flags(current_user, rows, now)
+        
+        # Linhas -> JSON com URLs completas, sem objetos ORM nem nova validação
+        response = FastJSONResponse(jornal_rows_to_dicts(rows, has_access))
+        set_next_cursor(response, rows, limit, "data_publicacao")
+        return response_cache.store(etag, response)
+    
+    # Requisições simultâneas com o mesmo ETag compartilham uma única consulta
+    entry = await catalog_flight.do(etag, load)
+    return response_cache.respond(entry, etag, MEMBER_CACHE_CONTROL)
+
+@router.get("/public/jornais", response_model=List[JornalResponse])
+async def list_public_jornais(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    busca: Optional[str] = None,
+    data_inicio: Optional[str] = None,
+    data_fim: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Lista jornais públicos (sem login) com busca e filtro de data (AAAA-MM-DD).
+
+    Com `busca`, os resultados vêm ordenados por relevância e paginados por `skip`.
+    """
+    version = await catalog_version.get(db)
+    etag = make_etag(version, ("public", skip, limit, cursor, busca, data_inicio, data_fim))
+    cached = response_cache.lookup(request, etag, PUBLIC_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+
+    query = select(*JORNAL_COLUMNS).where(Jornal.is_active == True)
+
+    # Filtro por data (espera formato YYYY-MM-DD)
+    if data_inicio:
+        try:
+            dt_inicio = _as_utc(datetime.strptime(data_inicio, "%Y-%m-%d"))
+            query = query.where(Jornal.data_publicacao >= dt_inicio)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="data_inicio inválida. Use AAAA-MM-DD")
+    if data_fim:
+        try:
+            dt_fim = _as_utc(datetime.strptime(data_fim, "%Y-%m-%d"))
+            query = query.where(Jornal.data_publicacao <= dt_fim)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="data_fim inválida. Use AAAA-MM-DD")
+
+    terms = search_terms(busca) if busca else []
+
+    async def load() -> CachedResponse:
+        if terms:
+            rows = await search_jornais(db, query, terms, skip, limit)
+            return response_cache.store(etag, FastJSONResponse(jornal_rows_to_dicts(rows)))
+
+        result = await db.execute(paginate(query, Jornal.data_publicacao, Jornal.id, skip, limit, cursor))
+        rows = result.all()
+        response = FastJSONResponse(jornal_rows_to_dicts(rows))
+        set_next_cursor(response, rows, limit, "data_publicacao")
+        return response_cache.store(etag, response)
+
+    # Requisições simultâneas com o mesmo ETag compartilham uma única consulta
+    entry = await catalog_flight.do(etag, load)
+    return response_cache.respond(entry, etag, PUBLIC_CACHE_CONTROL)
+
+@router.get("/busca", response_model=List[JornalTextSearchResult])
+async def search_jornal_text(
+    q: str,
+    skip: int = 0,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Busca termos no texto dos PDFs e retorna as edições e páginas encontradas, com trechos"""
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Informe ao menos um termo de busca")
+
+    results = await search_pages(db, terms, skip, limit)
+    has_access = access_flags(current_user, [jornal for jornal, _ in results])
+    # Edições pagas sem acesso mostram só as páginas encontradas, sem o texto
+    return [
+        JornalTextSearchResult(
+            id=jornal.id,
+            titulo=jornal.titulo,
+            capa=get_file_url(jornal.capa) if jornal.capa else None,
+            data_publicacao=jornal.data_publicacao,
+            has_access=has_access[jornal.id],
+            pages=[
+                PageMatch(page=page, snippet=text if has_access[jornal.id] else None)
+                for page, text in pages
+            ]
+        )
+        for jornal, pages in results
+    ]
+
+@router.get("/jornais/{jornal_id}", response_model=JornalResponse)
+async def get_jornal(jornal_id: int, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    """Obtém um jornal específico"""
+    result = await db.execute(select(Jornal).where(Jornal.id == jornal_id, Jornal.is_active == True))
+    jornal = result.scalars().first()
+    if not jornal:
+        raise HTTPException(status_code=404, detail="Jornal não encontrado")
+    
+    # Verifica se o usuário tem acesso ao jornal
+    if not check_jornal_access(current_user, jornal):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Você não tem acesso a este jornal"
+        )
+    
+    # Converte para response com URLs completas
+    jornal_response = JornalResponse(
+        id=jornal.id,
+        titulo=jornal.titulo,
+        capa=get_file_url(jornal.capa) if jornal.capa else None,
+        # URL assinada: o leitor baixa o PDF sem token e sem consulta ao banco
+        arquivopdf=get_file_url(jornal.arquivopdf, user_id=current_user.id, jornal_id=jornal.id),
+        data_publicacao=jornal.data_publicacao,
+        is_active=jornal.is_active,
+        created_at=jornal.created_at,
+        updated_at=jornal.updated_at,
+        has_access=True
+    )
+    
+    return jornal_response
+
+@router.api_route("/jornais/{jornal_id}/pdf", methods=["GET", "HEAD"], response_class=Response)
+async def download_jornal_pdf(
+    jornal_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Baixa o PDF de um jornal (aceita Range para leitura sob demanda e retomada)"""
+    is_admin = current_user.tipo_usuario == UserType.ADMIN
+    query = select(Jornal).where(Jornal.id == jornal_id)
+    if not is_admin:
+        query = query.where(Jornal.is_active == True)
+    result = await db.execute(query)
+    jornal = result.scalars().first()
+    if not jornal or not jornal.arquivopdf:
+        raise HTTPException(status_code=404, detail="Jornal não encontrado")
+    
+    # Administradores sempre têm acesso (can_access)
+    if not check_jornal_access(current_user, jornal):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Você não tem acesso a este jornal"
+        )
+    
+    return file_response(
+        request,
+        resolve_file_path(jornal.arquivopdf),
+        "application/pdf",
+        {
+            "Content-Disposition": f'inline; filename="jornal-{jornal.id}.pdf"',
+            "Cache-Control": MEMBER_CACHE_CONTROL,
+        },
+    )
+
+@router.api_route("/arquivos/{file_path:path}", methods=["GET", "HEAD"], response_class=Response)
+async def download_signed_file(file_path: str, request: Request, u: int, j: int, exp: int, sig: str):
+    """Baixa um arquivo por URL assinada (emitida em GET /user/jornais/{id})"""
+    if not verify_file_signature(u, j, file_path, exp, sig):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Link inválido ou expirado")
+    
+    # A URL não muda até expirar, então o cliente pode guardá-la até lá
+    max_age = max(exp - int(time.time()), 0)
+    return file_response(
+        request,
+        resolve_file_path(file_path),
+        mimetypes.guess_type(file_path)[0] or "application/octet-stream",
+        {"Cache-Control": f"private, max-age={max_age}"},
+    )
+
+@router.post("/subscriptions", response_model=dict)
+async def create_subscription(subscription: SubscriptionCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """Cria uma assinatura digital"""
+    
+    # Calcula data de término baseada no tipo de assinatura
+    start_date = datetime.utcnow()
+    
+    if subscription.subscription_type == SubscriptionType.DIARIO:
+        end_date = start_date + timedelta(days=1)
+    elif subscription.subscription_type == SubscriptionType.SEMANAL:
+        end_date = start_date + timedelta(weeks=1)
+    elif subscription.subscription_type == SubscriptionType.MENSAL:
+        end_date = start_date + timedelta(days=30)
+    elif subscription.subscription_type == SubscriptionType.ANUAL:
+        end_date = start_date + timedelta(days=365)
+    
+    # Cria a assinatura
+    db_subscription = Subscription(
+        user_id=current_user.id,
+        subscription_type=subscription.subscription_type,
+        start_date=start_date,
+        end_date=end_date,
+        payment_method="digital"
+    )
+    
+    db.add(db_subscription)
+    
+    # Atualiza o tipo de assinatura e o fim do acesso do usuário (mesma transação)
+    current_user.tipo_subscricao = subscription.subscription_type
+    extend_access(db, current_user.id, end_date)
+    
+    db.commit()
+    session_cache.invalidate_user(current_user.id)
+    db.refresh(db_subscription)
+    
+    return {
+        "message": "Assinatura criada com sucesso",
+        "subscription": db_subscription
+    }
+
+@router.get("/my-subscriptions", response_model=List[dict])
+async def get_my_subscriptions(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """Obtém as assinaturas do usuário atual"""
+    subscriptions = db.query(Subscription).filter(
+        Subscription.user_id == current_user.id,
+        Subscription.is_active == True
+    ).all()
+    
+    result = []
+    for sub in subscriptions:
+        result.append({
+            "id": sub.id,
+            "subscription_type": sub.subscription_type,
+            "start_date": sub.start_date,
+            "end_date": sub.end_date,
+            "is_active": sub.is_active and sub.end_date > datetime.utcnow(),
+            "payment_method": sub.payment_method,
+            "created_at": sub.created_at
+        })
+    
+    return result
+
+# -------------------- Subscription Requests (Pedidos) --------------------
+
+@router.post("/subscriptions/requests", response_model=SubscriptionRequestResponse)
+async def create_subscription_request(
+    body: SubscriptionRequestCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Cria um pedido de assinatura para revisão do admin"""
+
+    req = SubscriptionRequest(
+        user_id=current_user.id,
+        subscription_type=body.subscription_type,
+        status=SubscriptionRequestStatus.PENDING,
+        payment_reference=body.payment_reference,
+    )
+
+    db.add(req)
+    db.commit()
+    db.refresh(req)
+    return req
+
+@router.get("/subscriptions/requests/my", response_model=List[SubscriptionRequestResponse])
+async def list_my_subscription_requests(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Lista pedidos do usuário atual"""
+    reqs = db.query(SubscriptionRequest).filter(SubscriptionRequest.user_id == current_user.id).order_by(SubscriptionRequest.created_at.desc()).all()
+    return reqs
+
+def check_jornal_access(user: User, jornal: Jornal) -> bool:
+    """Verifica se o usuário tem acesso ao jornal (administrador, assinatura vigente ou edição do dia)"""
+    return can_access(user, jornal)
+
+@router.post("/logout")
+async def logout_user(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Logout do usuário (invalida sessões ativas)"""
+    user_id = current_user.id
+    
+    # Marca todas as sessões do usuário como inativas e eleva o epoch de sessão
+    session_epoch = revoke_user_sessions(user_id, db)
+    
+    db.commit()
+    session_cache.invalidate_user(user_id)
+    session_epochs.bump(user_id, session_epoch)
+    
+    return {"message": "Logout realizado com sucesso"}